@@ -1,17 +1,65 @@
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, \
+    TimeoutError as FutureTimeout
+from contextlib import closing
 from os.path import join, dirname
+from threading import Lock, Thread, Timer
 
+from ovos_bus_client.message import Message
 from ovos_utils import classproperty
+from ovos_utils.log import LOG
 from ovos_utils.ocp import MediaType, PlaybackType, Playlist, MediaEntry
-from ovos_utils.parse import fuzzy_match, MatchStrategy
 from ovos_utils.process_utils import RuntimeRequirements
-from ovos_workshop.decorators import ocp_search
+from ovos_workshop.decorators import ocp_search, ocp_play
 from ovos_workshop.skills.common_play import OVOSCommonPlaybackSkill
-from tutubo import YoutubeSearch
-from tutubo.models import Video, VideoPreview, Channel, ChannelPreview
+
+from .depth_history import DepthHistory, learned_depth, SELECTED, \
+    SETTLED, CHANNEL
+from .metrics import SearchMetrics, PrometheusTextfile, timed
+from .results import VideoResult, ChannelResult, channel_from_tutubo
+from .scoring import SearchScorer, TopK, compile_voc_matcher
+from .search_cache import SearchCache
+from .search_worker import SearchWorkerPool, SearchWorkerError, \
+    query_youtube, expand_channel
+from .single_flight import SingleFlight
+from .stream_resolver import StreamResolver, OCPStreamExtractor, \
+    StubExtractor
+from .thumbnail_cache import ThumbnailCache
+from .video_index import VideoIndex
+
+CHANNEL_URI = "youtube.channel//"
+VIDEO_URI = "youtube.video//"  # stream resolved by the skill at playback
+
+# tutubo is imported on the first search, not when the skill loads
+YoutubeSearch = None
 
 
 class SimpleYoutubeSkill(OVOSCommonPlaybackSkill):
     def __init__(self, *args, **kwargs):
+        # NOTE: set before super() because initialize is called from there
+        self.search_cache = None
+        self._refreshing = set()
+        self._refresh_lock = Lock()
+        self._channel_pool = ThreadPoolExecutor(max_workers=3)
+        # pulls search results when a search_timeout is set, see _until
+        self._fetch_pool = ThreadPoolExecutor(max_workers=4)
+        self.search_stats = Counter()  # cutoffs, upstream fetches...
+        self._flights = SingleFlight()
+        self._official_matchers = {}
+        self._prometheus = None
+        self._resolved_channels = {}  # url -> (timestamp, ChannelResult)
+        self._resolved_lock = Lock()
+        self.video_index = None
+        self.stream_resolver = None
+        self._search_workers = None
+        self.http_session = None
+        self._http_options = None
+        self._warm_up_timer = None
+        self.thumbnail_cache = None
+        self.depth_history = None
+        self._result_ranks = {}  # uri -> (pattern, rank, channel position)
+        self._tutubo_lock = Lock()
         super().__init__(supported_media=[MediaType.GENERIC, MediaType.VIDEO],
                          skill_icon=join(dirname(__file__), "res", "ytube.jpg"),
                          skill_voc_filename="youtube_skill",
@@ -19,51 +67,592 @@ class SimpleYoutubeSkill(OVOSCommonPlaybackSkill):
 
     @classproperty
     def runtime_requirements(self):
-        return RuntimeRequirements(internet_before_load=True,
-                                   network_before_load=True,
-                                   gui_before_load=True,
+        # load right away and stay loaded offline, searches need internet
+        # but the local index and search cache still answer without it,
+        # OCP provides the GUI
+        return RuntimeRequirements(internet_before_load=False,
+                                   network_before_load=False,
+                                   gui_before_load=False,
                                    requires_internet=True,
                                    requires_network=True,
-                                   requires_gui=True,
-                                   no_internet_fallback=False,
-                                   no_network_fallback=False,
-                                   no_gui_fallback=False)
+                                   requires_gui=False,
+                                   no_internet_fallback=True,
+                                   no_network_fallback=True,
+                                   no_gui_fallback=True)
 
     def initialize(self):
         if "fallback_mode" not in self.settings:
             self.settings["fallback_mode"] = False
+        if "cache_enabled" not in self.settings:
+            self.settings["cache_enabled"] = True
+        if "cache_ttl" not in self.settings:
+            self.settings["cache_ttl"] = 6 * 3600  # seconds
+        if "cache_max_entries" not in self.settings:
+            self.settings["cache_max_entries"] = 500
+        if "cache_stale_while_revalidate" not in self.settings:
+            self.settings["cache_stale_while_revalidate"] = True
+        if "coalesce_searches" not in self.settings:
+            self.settings["coalesce_searches"] = True
+        if "http_session" not in self.settings:
+            # patches tutubo for every skill in this process, opt in
+            self.settings["http_session"] = False
+        if "http_rate_limit" not in self.settings:
+            self.settings["http_rate_limit"] = 5  # requests/s, 0 to disable
+        if "http_burst" not in self.settings:
+            self.settings["http_burst"] = 10
+        if "http_max_connections" not in self.settings:
+            self.settings["http_max_connections"] = 10
+        if "http_retries" not in self.settings:
+            self.settings["http_retries"] = 3
+        http_options = None
+        if self.settings["http_session"]:
+            # installed on first search, see _load_tutubo
+            http_options = self._http_options = {
+                "rate": self.settings["http_rate_limit"],
+                "burst": self.settings["http_burst"],
+                "max_connections": self.settings["http_max_connections"],
+                "retries": self.settings["http_retries"]}
+        if "search_workers" not in self.settings:
+            self.settings["search_workers"] = 0  # search in process
+        if "search_worker_max_tasks" not in self.settings:
+            self.settings["search_worker_max_tasks"] = 100
+        if "search_worker_wait" not in self.settings:
+            self.settings["search_worker_wait"] = 0.5
+        if self.settings["search_workers"]:
+            try:
+                self._search_workers = SearchWorkerPool(
+                    self.settings["search_workers"],
+                    max_tasks=self.settings["search_worker_max_tasks"],
+                    http_options=http_options)
+            except Exception as e:
+                LOG.error(f"failed to start youtube search workers, "
+                          f"searching in process: {e}")
+        if "channel_timeout" not in self.settings:
+            self.settings["channel_timeout"] = 4  # seconds
+        if "search_timeout" not in self.settings:
+            self.settings["search_timeout"] = 0  # seconds, 0 for no limit
+        if "min_confidence" not in self.settings:
+            self.settings["min_confidence"] = None
+        if "max_depth" not in self.settings:
+            self.settings["max_depth"] = 50  # youtube results per search
+        if "max_channel_videos" not in self.settings:
+            self.settings["max_channel_videos"] = 5
+        if "adaptive_depth" not in self.settings:
+            self.settings["adaptive_depth"] = False
+        if "max_results" not in self.settings:
+            self.settings["max_results"] = 0  # 0 for no limit
+        if "early_exit_confidence" not in self.settings:
+            self.settings["early_exit_confidence"] = 90
+        if "early_exit_count" not in self.settings:
+            self.settings["early_exit_count"] = 0  # 0 to never exit early
+        if "lazy_channels" not in self.settings:
+            self.settings["lazy_channels"] = False
+        if "local_index" not in self.settings:
+            self.settings["local_index"] = True
+        if "local_index_results" not in self.settings:
+            self.settings["local_index_results"] = 10
+        if "local_index_max_entries" not in self.settings:
+            self.settings["local_index_max_entries"] = 5000
+        if "local_index_max_age" not in self.settings:
+            self.settings["local_index_max_age"] = 30 * 24 * 3600  # seconds
+        if "prefetch_streams" not in self.settings:
+            self.settings["prefetch_streams"] = False
+        if "prefetch_top_k" not in self.settings:
+            self.settings["prefetch_top_k"] = 3
+        if "stream_extractor" not in self.settings:
+            self.settings["stream_extractor"] = "ocp"  # or "stub"
+        if "stream_wait" not in self.settings:
+            self.settings["stream_wait"] = 5  # seconds
+        if self.settings["prefetch_streams"]:
+            if self.settings["stream_extractor"] == "stub":
+                extractor = StubExtractor()
+            else:
+                extractor = OCPStreamExtractor()
+            self.stream_resolver = StreamResolver(extractor)
+        if "thumbnail_cache" not in self.settings:
+            self.settings["thumbnail_cache"] = False
+        if "thumbnail_cache_max_mb" not in self.settings:
+            self.settings["thumbnail_cache_max_mb"] = 50
+        if "thumbnail_size" not in self.settings:
+            self.settings["thumbnail_size"] = [320, 180]
+        if "thumbnail_top_k" not in self.settings:
+            self.settings["thumbnail_top_k"] = 10
+        if self.settings["thumbnail_cache"]:
+            max_mb = self.settings["thumbnail_cache_max_mb"]
+            self.thumbnail_cache = ThumbnailCache(
+                join(self.file_system.path, "thumbnails"),
+                max_bytes=max_mb * 1024 * 1024,
+                size=self.settings["thumbnail_size"])
+        if "metrics_textfile" not in self.settings:
+            self.settings["metrics_textfile"] = ""  # prometheus export path
+        if self.settings["metrics_textfile"]:
+            self._prometheus = PrometheusTextfile(
+                self.settings["metrics_textfile"])
+        self.search_cache = SearchCache(
+            join(self.file_system.path, "search_cache.db"),
+            ttl=self.settings["cache_ttl"],
+            max_entries=self.settings["cache_max_entries"])
+        self.video_index = VideoIndex(
+            join(self.file_system.path, "video_index.db"),
+            max_entries=self.settings["local_index_max_entries"],
+            max_age=self.settings["local_index_max_age"])
+        self.depth_history = DepthHistory(
+            join(self.file_system.path, "depth_history.db"))
+        self.add_event("ovos.common_play.play", self._on_ocp_play)
+        # compiled now instead of during the first search
+        self._get_scorer("")
+        if "warm_up" not in self.settings:
+            self.settings["warm_up"] = False
+        if self.settings["warm_up"]:
+            # preload tutubo shortly after the skill finished loading
+            self._warm_up_timer = Timer(2, self._load_tutubo)
+            self._warm_up_timer.daemon = True
+            self._warm_up_timer.start()
+
+    def shutdown(self):
+        if self._warm_up_timer:
+            self._warm_up_timer.cancel()
+        self._channel_pool.shutdown(wait=False)
+        self._fetch_pool.shutdown(wait=False)
+        if self.stream_resolver:
+            self.stream_resolver.shutdown()
+        if self.thumbnail_cache:
+            self.thumbnail_cache.shutdown()
+        if self._search_workers:
+            self._search_workers.shutdown()
+        super().shutdown()
 
     # score
+    def _get_scorer(self, phrase):
+        """ scorer for a single search, the official.voc matcher is
+        compiled once per language """
+        if self.lang not in self._official_matchers:
+            self._official_matchers[self.lang] = compile_voc_matcher(
+                self.voc_list("official"))
+        return SearchScorer(phrase, self._official_matchers[self.lang],
+                            fallback_mode=self.settings["fallback_mode"])
+
     def calc_score(self, phrase, match, idx=0, explicit_request=False,
                    base_score=0):
+        return self._get_scorer(phrase).video_score(
+            match.title, idx, explicit_request, base_score)
+
+    def calc_channel_score(self, phrase, match, idx=0, explicit_request=False,
+                           base_score=0):
+        return self._get_scorer(phrase).channel_score(
+            match.title, idx, explicit_request, base_score)
 
-        # shared logic
-        score = self.calc_channel_score(phrase, match, idx,
-                                        explicit_request, base_score)
+    # search
+    def _expand_channel(self, v, metrics=None):
+        """ parse a channel page into a ChannelResult """
+        return expand_channel(v, metrics)
 
-        # the title says its official!
-        if self.voc_match(match.title, "official"):
-            score += 5
+    def _resolve_channel(self, url):
+        """ parse a channel selected from a lazy search result """
+        with self._resolved_lock:
+            cached = self._resolved_channels.get(url)
+        if cached and time.time() - cached[0] < self.settings["cache_ttl"]:
+            return cached[1]
+        from tutubo import Channel
+        self._load_tutubo()
+        result = channel_from_tutubo(Channel(url), url,
+                                     self.settings["max_channel_videos"])
+        with self._resolved_lock:
+            self._resolved_channels[url] = (time.time(), result)
+            while len(self._resolved_channels) > 20:
+                # drop the oldest entry
+                self._resolved_channels.pop(
+                    next(iter(self._resolved_channels)))
+        return result
 
-        return min(100, score)
+    def _fetch_results(self, phrase, metrics=None, max_vids=None):
+        """ query youtube, identical concurrent searches share one upstream
+        fetch instead of each querying youtube """
+        def drain():
+            # stopped at the learned depth, unless other searches still
+            # read the shared results
+            return metrics is not None and metrics.cutoff == "depth" and \
+                (not coalesce or self._flights.readers(key) <= 1)
 
-    def calc_channel_score(self, phrase, match, idx=0, explicit_request=False,
-                           base_score=0):
-        # idx represents the order from youtube
-        score = base_score - idx  # - 1% as we go down the results list
+        coalesce = self.settings["coalesce_searches"]
+        if not coalesce:
+            yield from self._fetch_and_index(phrase, metrics, max_vids,
+                                             drain)
+            return
+        # only searches fetching the same results can share them
+        max_vids = max_vids or self.settings["max_channel_videos"]
+        lazy = int(self.settings["lazy_channels"])
+        depth = self.settings["max_depth"]
+        key = f"{lazy}|{depth}|{max_vids}|{' '.join(phrase.lower().split())}"
+        results, shared = self._flights.join(
+            key, lambda: self._fetch_and_index(phrase, metrics, max_vids,
+                                               drain))
+        if shared:
+            self.search_stats["coalesced"] += 1
+            if metrics:
+                metrics.coalesced = True
+                # time spent waiting on the search we joined
+                results = timed(results, metrics, "fetch")
+        yield from results
+
+    def _fetch_and_index(self, phrase, metrics=None, max_vids=None,
+                         drain=None):
+        """ query youtube, every video seen is added to the local index """
+        self.search_stats["upstream_fetches"] += 1
+        seen = []
+        try:
+            for r in self._query_youtube(phrase, metrics, max_vids, drain):
+                seen.append(r)
+                yield r
+        finally:
+            self._index_results(seen)
+
+    def _load_tutubo(self):
+        """ import tutubo and route its requests through the shared http
+        session, done on the first search or by the warm up timer """
+        global YoutubeSearch
+        with self._tutubo_lock:
+            if YoutubeSearch is None:
+                from tutubo import YoutubeSearch
+            if self._http_options is not None and not self.http_session:
+                from .http_session import install_session
+                self.http_session = install_session(**self._http_options)
+
+    def _query_youtube(self, phrase, metrics=None, max_vids=None,
+                       drain=None):
+        """ query youtube and yield compact VideoResult/ChannelResult,
+        in a search worker process if enabled, see query_youtube for drain """
+        timeout = self.settings["channel_timeout"]
+        if self.settings["search_timeout"]:
+            timeout = min(timeout, self.settings["search_timeout"])
+        options = {"channel_timeout": timeout,
+                   "lazy_channels": self.settings["lazy_channels"],
+                   "max_res": self.settings["max_depth"],
+                   "max_vids": max_vids or
+                   self.settings["max_channel_videos"]}
+        metrics = metrics or SearchMetrics(phrase)
+
+        results = None
+        if self._search_workers:
+            results = self._search_workers.search(
+                phrase, options, metrics,
+                timeout=self.settings["search_worker_wait"], drain=drain)
+            if results is None:
+                self.search_stats["worker_busy"] += 1
+        if results is not None:
+            n = 0
+            try:
+                for r in timed(results, metrics, "fetch"):
+                    n += 1
+                    yield r
+                return
+            except SearchWorkerError as e:
+                LOG.error(e)
+                self.search_stats["worker_errors"] += 1
+                if n:  # results already yielded, do not repeat them
+                    return
+
+        self._load_tutubo()
+        yield from query_youtube(YoutubeSearch(phrase), self._channel_pool,
+                                 metrics=metrics, drain=drain, **options)
+
+    def _refresh_cache(self, key, phrase, max_vids=None):
+        with self._refresh_lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                self.search_cache.put(key, list(self._fetch_results(
+                    phrase, max_vids=max_vids)))
+            except Exception as e:
+                LOG.error(f"failed to refresh youtube cache for "
+                          f"'{phrase}': {e}")
+            finally:
+                with self._refresh_lock:
+                    self._refreshing.discard(key)
+
+        Thread(target=refresh, daemon=True).start()
+
+    def _cache_key(self, phrase, media_type, explicit_request=False,
+                   max_vids=None):
+        """ results fetched with other channel or depth settings are not
+        reused """
+        return self.search_cache.make_key(
+            phrase, media_type, explicit_request,
+            lazy_channels=self.settings["lazy_channels"],
+            max_depth=self.settings["max_depth"],
+            max_vids=max_vids or self.settings["max_channel_videos"])
+
+    def _search_results(self, phrase, media_type, explicit_request=False,
+                        metrics=None, max_vids=None):
+        """ yield search results, served from the cache when possible """
+        if not self.search_cache or not self.settings["cache_enabled"]:
+            try:
+                yield from self._fetch_results(phrase, metrics, max_vids)
+            except Exception as e:
+                self._upstream_error(phrase, metrics, e)
+            return
+
+        key = self._cache_key(phrase, media_type, explicit_request, max_vids)
+        cached = self.search_cache.get(key)
+        if cached:
+            results, stale = cached
+            if metrics:
+                metrics.cache = "stale" if stale else "hit"
+            if not stale:
+                yield from results
+                return
+            if self.settings["cache_stale_while_revalidate"]:
+                # serve the old results now, update them in the background
+                self._refresh_cache(key, phrase, max_vids)
+                yield from results
+                return
+
+        if metrics:
+            metrics.cache = "miss"
+        results = []
+        try:
+            for r in self._fetch_results(phrase, metrics, max_vids):
+                results.append(r)
+                yield r
+        except GeneratorExit:
+            # stopped at the learned depth, as complete as it needs to be
+            if metrics and metrics.cutoff == "depth":
+                self.search_cache.put(key, results)
+            raise
+        except Exception as e:
+            # incomplete results are not cached
+            self._upstream_error(phrase, metrics, e)
+            return
+        self.search_cache.put(key, results)
+
+    def _upstream_error(self, phrase, metrics, error):
+        """ youtube failed mid search (tutubo raises on network errors),
+        the search ends with the results already yielded """
+        LOG.error(f"youtube search failed for '{phrase}': {error}")
+        if metrics:
+            self._search_cutoff(metrics, "upstream_error")
+        else:
+            self.search_stats["upstream_error"] += 1
+
+    def _until(self, results, deadline, metrics):
+        """ iterate results until the deadline, then close them
+
+        every result is pulled in the fetch pool, a page fetch still running
+        at the deadline is abandoned instead of waited for
+        """
+        if not deadline:
+            with closing(results):
+                yield from results
+            return
+        pull = None
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._search_cutoff(metrics, "deadline")
+                    return
+                pull = self._fetch_pool.submit(next, results, None)
+                try:
+                    v = pull.result(timeout=remaining)
+                except FutureTimeout:
+                    self._search_cutoff(metrics, "deadline")
+                    return
+                if v is None:
+                    return
+                yield v
+        finally:
+            if pull is not None and not pull.cancel() and not pull.done():
+                # still fetching in the pool, close once the fetch returns
+                pull.add_done_callback(lambda _: results.close())
+            else:
+                results.close()
+
+    def _search_cutoff(self, metrics, reason):
+        self.search_stats[reason] += 1
+        metrics.cutoff = reason
+
+    def _report_metrics(self, metrics):
+        """ emit the timings of a finished search """
+        data = metrics.as_dict()
+        LOG.debug(f"youtube search metrics: {data}")
+        self.bus.emit(Message(f"{self.skill_id}.search.metrics", data))
+        if self._prometheus:
+            try:
+                self._prometheus.observe(data)
+            except Exception as e:
+                LOG.error(f"failed to export youtube search metrics: {e}")
+
+    def _video_entry(self, v, score, resolve=False):
+        """ resolve: the stream is being resolved in the background,
+        OCP hands playback to play_stream instead of extracting it """
+        image = self._thumbnail(v.image)
+        # return as a video result (single track dict)
+        return MediaEntry(
+            uri=VIDEO_URI + v.uri if resolve else v.uri,
+            match_confidence=score,
+            playback=PlaybackType.SKILL if resolve else PlaybackType.VIDEO,
+            media_type=MediaType.VIDEO,
+            length=v.length * 1000 if v.length else 0,
+            image=image,
+            title=v.title,
+            skill_id=self.skill_id,
+            skill_icon=self.skill_icon
+        )
+
+    def _thumbnail(self, url):
+        """ local copy of a thumbnail once downloaded, else the url """
+        if self.thumbnail_cache and url:
+            path = self.thumbnail_cache.get(url)
+            if path:
+                return "file://" + path
+        return url
+
+    def _prefetch_thumbnail(self, top, url, score):
+        """ download thumbnails of the top k results seen so far """
+        if self.thumbnail_cache and top.k and top.offer(score):
+            self.thumbnail_cache.prefetch([url])
+
+    def _prefetch_stream(self, top, v, score):
+        """ resolve streams of the top k video results seen so far,
+        True if v is one of them """
+        if self.stream_resolver and top.k and top.offer(score):
+            self.stream_resolver.prefetch([v.uri])
+            return True
+        return False
+
+    def _local_results(self, phrase, media_type, explicit_request=False,
+                       max_vids=None):
+        """ previously seen videos matching the phrase, none when the
+        search cache answers the query with its own ranking """
+        if not self.video_index or not self.settings["local_index"]:
+            return []
+        if self.search_cache and self.settings["cache_enabled"] and \
+                self.search_cache.fresh(self._cache_key(
+                    phrase, media_type, explicit_request, max_vids)):
+            return []
+        try:
+            return self.video_index.search(
+                phrase, limit=self.settings["local_index_results"])
+        except Exception as e:
+            LOG.error(f"youtube local index search failed: {e}")
+            return []
+
+    def _index_results(self, results):
+        if not self.video_index or not self.settings["local_index"]:
+            return
+        videos = []
+        for r in results:
+            if isinstance(r, ChannelResult):
+                videos += r.videos
+            else:
+                videos.append(r)
+        try:
+            self.video_index.add(videos)
+        except Exception as e:
+            LOG.error(f"failed to update youtube local index: {e}")
+
+    # adaptive depth
+    @staticmethod
+    def _depth_pattern(phrase, media_type, explicit_request):
+        """ depth history key of a query """
+        kind = f"{int(media_type)}:{int(explicit_request)}"
+        return f"{kind}:{' '.join(phrase.lower().split())}"
+
+    def _search_depth(self, pattern):
+        """ how many results and channel videos to fetch, learned from
+        previous searches of the same query
+
+        results past the depth are only fetched while no result scored
+        early_exit_confidence yet
+        """
+        depth = self.settings["max_depth"]
+        max_vids = self.settings["max_channel_videos"]
+        if not self.depth_history or not self.settings["adaptive_depth"]:
+            return depth, max_vids
+        learned_res = learned_vids = None
+        try:
+            learned_res = learned_depth(
+                self.depth_history.values(pattern, SELECTED) +
+                self.depth_history.values(pattern, SETTLED),
+                cap=depth, floor=5)
+            learned_vids = learned_depth(
+                self.depth_history.values(pattern, CHANNEL),
+                cap=max_vids, margin=1)
+        except Exception as e:
+            LOG.error(f"failed to read youtube search depth history: {e}")
+        return learned_res or depth, learned_vids or max_vids
+
+    def _record_depth(self, pattern, kind, value):
+        if not self.depth_history or not self.settings["adaptive_depth"]:
+            return
+        try:
+            self.depth_history.add(pattern, kind, value)
+        except Exception as e:
+            LOG.error(f"failed to update youtube search depth history: {e}")
 
-        score += 100 * fuzzy_match(phrase.lower(), match.title.lower(),
-                                   strategy=MatchStrategy.TOKEN_SET_RATIO)
+    def _remember_rank(self, uri, pattern, rank, position=None):
+        self._result_ranks[uri] = (pattern, rank, position)
+        while len(self._result_ranks) > 500:
+            # drop the oldest entry
+            self._result_ranks.pop(next(iter(self._result_ranks)))
 
-        # youtube gives pretty high scores in general, so we allow it
-        # to run as fallback mode, which assigns lower scores and gives
-        # preference to matches from other skills
-        if self.settings["fallback_mode"]:
-            if not explicit_request:
-                score -= 25
-        return min(100, score)
+    def _on_ocp_play(self, message):
+        """ learn the rank of the search result the user played """
+        media = message.data.get("media") or {}
+        ranked = self._result_ranks.get(media.get("uri"))
+        if not ranked:
+            return
+        pattern, rank, position = ranked
+        self._record_depth(pattern, SELECTED, rank)
+        if position is not None:
+            self._record_depth(pattern, CHANNEL, position)
 
     # common play
+    @ocp_play()
+    def play_youtube(self, message):
+        """ results yielded as PlaybackType.SKILL, selected by OCP """
+        media = message.data.get("media") or message.data
+        uri = media.get("uri", "")
+        if uri.startswith(CHANNEL_URI):
+            self.play_channel(media)
+        elif uri.startswith(VIDEO_URI):
+            self.play_stream(media)
+        else:
+            LOG.error(f"unknown youtube media: {uri}")
+
+    def play_stream(self, media):
+        """ play a top result with the stream resolved during the search,
+        waits for a resolution still in progress """
+        uri = media["uri"][len(VIDEO_URI):]
+        stream = None
+        if self.stream_resolver:
+            stream = self.stream_resolver.resolve(
+                uri, timeout=self.settings["stream_wait"])
+        entry = MediaEntry.from_dict(media)
+        # not resolved in time, OCP extracts the stream itself
+        entry.uri = stream["uri"] if stream else uri
+        entry.playback = PlaybackType.VIDEO
+        self.play_media(entry.as_dict)
+
+    def play_channel(self, media):
+        """ resolve a lazy channel result once OCP selects it """
+        uri = media["uri"]
+        try:
+            ch = self._resolve_channel(uri[len(CHANNEL_URI):])
+        except Exception as e:
+            LOG.error(f"failed to parse youtube channel: {e}")
+            return
+        playlist = [self._video_entry(v, media.get("match_confidence", 0)
+                                      ).as_dict for v in ch.videos]
+        if not playlist:
+            LOG.error(f"youtube channel has no videos: {uri}")
+            return
+        self.play_media(playlist[0], disambiguation=playlist,
+                        playlist=playlist)
+
     @ocp_search()
     def search_youtube(self, phrase, media_type):
         # match the request media_type
@@ -80,115 +669,175 @@ class SimpleYoutubeSkill(OVOSCommonPlaybackSkill):
             phrase = self.remove_voc(phrase, "youtube")
             explicit_request = True
 
+        # search budget, see README
+        timeout = self.settings["search_timeout"]
+        deadline = time.monotonic() + timeout if timeout else None
+        min_conf = self.settings["min_confidence"]
+        best = TopK(self.settings["max_results"])
+        early_conf = self.settings["early_exit_confidence"]
+        early_count = self.settings["early_exit_count"]
+        confident = 0
+
+        # how deep to search, see _search_depth
+        pattern = self._depth_pattern(phrase, media_type, explicit_request)
+        depth, max_vids = self._search_depth(pattern)
+        best_score = None
+        settled = 0  # last rank that reached the best score
+        draining = False  # past the depth, only pending channels follow
+
+        self.search_stats["searches"] += 1
+        metrics = SearchMetrics(phrase)
+        scorer = self._get_scorer(phrase)
+        top = TopK(self.settings["prefetch_top_k"])
+        top_thumbs = TopK(self.settings["thumbnail_top_k"])
         idx = 0
-        for v in YoutubeSearch(phrase).iterate_youtube(max_res=50):
-            if isinstance(v, Video) or isinstance(v, VideoPreview):
-                score = self.calc_score(phrase, v, idx,
-                                        base_score=base_score,
-                                        explicit_request=explicit_request)
-                # return as a video result (single track dict)
-                yield MediaEntry(
-                    uri=v.watch_url,
-                    match_confidence=score,
-                    playback=PlaybackType.VIDEO,
-                    media_type=MediaType.VIDEO,
-                    length=v.length * 1000 if v.length else 0,
-                    image=v.thumbnail_url,
-                    title=v.title,
-                    skill_id=self.skill_id,
-                    skill_icon=self.skill_icon
-                )
-                idx += 1
-            elif isinstance(v, Channel) or isinstance(v, ChannelPreview):
-                s = self.calc_channel_score(phrase, v, idx,
-                                            base_score=base_score,
-                                            explicit_request=explicit_request)
-                ch = v.get()  # parse channel page
-                # create playlist (list of track dicts)
-                max_vids = 5
-                pl = Playlist(
-                    match_confidence=s,
-                    playback=PlaybackType.VIDEO,
-                    media_type=MediaType.VIDEO,
-                    image=ch.thumbnail_url,
-                    title=ch.title + " (Youtube Channel)",
-                    skill_id=self.skill_id,
-                    skill_icon=self.skill_icon
-                )
-                for vidx, v in enumerate(ch.videos):
-                    if "patreon" in v.title.lower():  # TODO blacklist.voc
-                        continue
-                    pl.append(MediaEntry(
-                        uri=v.watch_url,
-                        match_confidence=self.calc_score(phrase, v, idx=vidx),
-                        playback=PlaybackType.VIDEO,
-                        media_type=MediaType.VIDEO,
-                        length=v.length * 1000 if v.length else 0,
-                        image=v.thumbnail_url,
-                        title=v.title,
-                        skill_id=self.skill_id,
-                        skill_icon=self.skill_icon
-                    ))
-                    if vidx > max_vids:
+        try:
+            # answer from the local index first, network results follow.
+            # local hits rank past the deepest network result, a network
+            # copy of the same video that scores higher is yielded again
+            start = time.perf_counter()
+            local = self._local_results(phrase, media_type,
+                                        explicit_request, max_vids)
+            offset = self.settings["max_depth"]
+            scores = scorer.video_scores(
+                [v.title for v in local], base_score=base_score,
+                explicit_request=explicit_request,
+                positions=list(range(offset, offset + len(local))))
+            metrics.add("index", time.perf_counter() - start)
+            seen = {}  # uri -> score yielded from the local index
+            for v, score in zip(local, scores):
+                if min_conf is not None and score < min_conf:
+                    self.search_stats["min_confidence"] += 1
+                    continue
+                if not best.offer(score):
+                    self.search_stats["max_results"] += 1
+                    continue
+                resolve = self._prefetch_stream(top, v, score)
+                self._prefetch_thumbnail(top_thumbs, v.image, score)
+                metrics.add_result()
+                seen[v.uri] = score
+                yield self._video_entry(v, score, resolve)
+                if score >= early_conf:
+                    confident += 1
+            if early_count and confident >= early_count:
+                self._search_cutoff(metrics, "early_exit")
+                return
+
+            # closing the results generator stops any further page fetches
+            results = self._search_results(phrase, media_type,
+                                           explicit_request, metrics,
+                                           max_vids)
+            with closing(self._until(results, deadline, metrics)) as results:
+                for v in results:
+                    if self._stop_event.is_set():
+                        self._search_cutoff(metrics, "ocp_stop")
                         break
+                    if not draining and idx >= depth and \
+                            best_score is not None and \
+                            best_score >= early_conf:
+                        # confident at the learned depth, skip deeper pages
+                        # but keep the channels already being parsed
+                        self._search_cutoff(metrics, "depth")
+                        draining = True
+                    elif draining and not isinstance(v, ChannelResult):
+                        break  # results are still being fetched
+                    if draining and (not isinstance(v, ChannelResult) or
+                                     v.rank is None or v.rank >= depth):
+                        continue
 
-                yield pl
-            else:
-                continue
-
-
-if __name__ == "__main__":
-    from ovos_utils.messagebus import FakeBus
-
-    s = SimpleYoutubeSkill(bus=FakeBus(), skill_id="t.fake")
-
-    for r in s.search_youtube("zz top", MediaType.MUSIC):
-        print(r)
-        # MediaEntry(uri='https://www.youtube.com/watch?v=Ae829mFAGGE', title="ZZ Top - Gimme All Your Lovin' (Official Music Video) [HD Remaster]", artist='', match_confidence=50.0, skill_id='t.fake', playback=<PlaybackType.VIDEO: 1>, status=<TrackState.DISAMBIGUATION: 1>, media_type=<MediaType.VIDEO: 3>, length=280000, image='https://img.youtube.com/vi/Ae829mFAGGE/default.jpg', skill_icon='/home/miro/PycharmProjects/skill-ovos-youtube/res/ytube.jpg', javascript='')
-        # MediaEntry(uri='https://www.youtube.com/watch?v=Gg9cNGHl-bg', title='ZZ Top - La Grange (Live From Gruene Hall) | Stages', artist='', match_confidence=49.0, skill_id='t.fake', playback=<PlaybackType.VIDEO: 1>, status=<TrackState.DISAMBIGUATION: 1>, media_type=<MediaType.VIDEO: 3>, length=278000, image='https://img.youtube.com/vi/Gg9cNGHl-bg/default.jpg', skill_icon='/home/miro/PycharmProjects/skill-ovos-youtube/res/ytube.jpg', javascript='')
-        # MediaEntry(uri='https://www.youtube.com/watch?v=7wRHBLwpASw', title='ZZ Top - Sharp Dressed Man (Official Music Video) [HD Remaster]', artist='', match_confidence=48.0, skill_id='t.fake', playback=<PlaybackType.VIDEO: 1>, status=<TrackState.DISAMBIGUATION: 1>, media_type=<MediaType.VIDEO: 3>, length=254000, image='https://img.youtube.com/vi/7wRHBLwpASw/default.jpg', skill_icon='/home/miro/PycharmProjects/skill-ovos-youtube/res/ytube.jpg', javascript='')
-        # MediaEntry(uri='https://www.youtube.com/watch?v=PCtcRfvcOqs', title='The Very Best of ZZTOP - ZZTOP Greatest Hits Full Album', artist='', match_confidence=-34.81818181818181, skill_id='t.fake', playback=<PlaybackType.VIDEO: 1>, status=<TrackState.DISAMBIGUATION: 1>, media_type=<MediaType.VIDEO: 3>, length=5997000, image='https://img.youtube.com/vi/PCtcRfvcOqs/default.jpg', skill_icon='/home/miro/PycharmProjects/skill-ovos-youtube/res/ytube.jpg', javascript='')
-        # MediaEntry(uri='https://www.youtube.com/watch?v=eUDcTLaWJuo', title='ZZ Top - Legs (Official Music Video) [HD Remaster]', artist='', match_confidence=46.0, skill_id='t.fake', playback=<PlaybackType.VIDEO: 1>, status=<TrackState.DISAMBIGUATION: 1>, media_type=<MediaType.VIDEO: 3>, length=296000, image='https://img.youtube.com/vi/eUDcTLaWJuo/default.jpg', skill_icon='/home/miro/PycharmProjects/skill-ovos-youtube/res/ytube.jpg', javascript='')
-        # MediaEntry(uri='https://www.youtube.com/watch?v=Z_4ULKpkLNc', title='ZZ Top - Rough Boy (Official Music Video)', artist='', match_confidence=45.0, skill_id='t.fake', playback=<PlaybackType.VIDEO: 1>, status=<TrackState.DISAMBIGUATION: 1>, media_type=<MediaType.VIDEO: 3>, length=228000, image='https://img.youtube.com/vi/Z_4ULKpkLNc/default.jpg', skill_icon='/home/miro/PycharmProjects/skill-ovos-youtube/res/ytube.jpg', javascript='')
-        # MediaEntry(uri='https://www.youtube.com/watch?v=kaIZWjItReI', title='ZZ Top - I Gotsta Get Paid', artist='', match_confidence=44.0, skill_id='t.fake', playback=<PlaybackType.VIDEO: 1>, status=<TrackState.DISAMBIGUATION: 1>, media_type=<MediaType.VIDEO: 3>, length=219000, image='https://img.youtube.com/vi/kaIZWjItReI/default.jpg', skill_icon='/home/miro/PycharmProjects/skill-ovos-youtube/res/ytube.jpg', javascript='')
-        # MediaEntry(uri='https://www.youtube.com/watch?v=kxOOC2Wf1rQ', title='ZZ Top   La grange, Tush Live In Montreux 2013', artist='', match_confidence=43.0, skill_id='t.fake', playback=<PlaybackType.VIDEO: 1>, status=<TrackState.DISAMBIGUATION: 1>, media_type=<MediaType.VIDEO: 3>, length=552000, image='https://img.youtube.com/vi/kxOOC2Wf1rQ/default.jpg', skill_icon='/home/miro/PycharmProjects/skill-ovos-youtube/res/ytube.jpg', javascript='')
-        # Playlist(title='ZZ Top (Youtube Channel)', artist='', position=0, image='https://yt3.googleusercontent.com/Y2jeeBQuUyBRb10nxTkWrNwGyO90fz7RRGpJ-jovV0P0apKG1XQErkktScQ5h953ww90LAtQGUY=s900-c-k-c0x00ffffff-no-rj', match_confidence=42.0, skill_id='t.fake', skill_icon='/home/miro/PycharmProjects/skill-ovos-youtube/res/ytube.jpg', playback=<PlaybackType.VIDEO: 1>, media_type=<MediaType.VIDEO: 3>)
-        # MediaEntry(uri='https://www.youtube.com/watch?v=gre65UqotpQ', title="ZZ Top - She's Got Legs - BeachLife Festival 2024", artist='', match_confidence=42.0, skill_id='t.fake', playback=<PlaybackType.VIDEO: 1>, status=<TrackState.DISAMBIGUATION: 1>, media_type=<MediaType.VIDEO: 3>, length=297000, image='https://img.youtube.com/vi/gre65UqotpQ/default.jpg', skill_icon='/home/miro/PycharmProjects/skill-ovos-youtube/res/ytube.jpg', javascript='')
-        # MediaEntry(uri='https://www.youtube.com/watch?v=TG2JtdUEMJU', title="ZZ Top - Gimme All Your Lovin' (Live)", artist='', match_confidence=41.0, skill_id='t.fake', playback=<PlaybackType.VIDEO: 1>, status=<TrackState.DISAMBIGUATION: 1>, media_type=<MediaType.VIDEO: 3>, length=258000, image='https://img.youtube.com/vi/TG2JtdUEMJU/default.jpg', skill_icon='/home/miro/PycharmProjects/skill-ovos-youtube/res/ytube.jpg', javascript='')
-        # MediaEntry(uri='https://www.youtube.com/watch?v=fnwZeLdLPdQ', title='ZZ Top- La Grange (lyrics)', artist='', match_confidence=-10.0, skill_id='t.fake', playback=<PlaybackType.VIDEO: 1>, status=<TrackState.DISAMBIGUATION: 1>, media_type=<MediaType.VIDEO: 3>, length=221000, image='https://img.youtube.com/vi/fnwZeLdLPdQ/default.jpg', skill_icon='/home/miro/PycharmProjects/skill-ovos-youtube/res/ytube.jpg', javascript='')
-        # MediaEntry(uri='https://www.youtube.com/watch?v=7FGHq4eo9HQ', title='ZZ TOP - FULL SHOW@Musikfest Bethlehem, PA 8/11/24', artist='', match_confidence=39.0, skill_id='t.fake', playback=<PlaybackType.VIDEO: 1>, status=<TrackState.DISAMBIGUATION: 1>, media_type=<MediaType.VIDEO: 3>, length=5066000, image='https://img.youtube.com/vi/7FGHq4eo9HQ/default.jpg', skill_icon='/home/miro/PycharmProjects/skill-ovos-youtube/res/ytube.jpg', javascript='')
-        # MediaEntry(uri='https://www.youtube.com/watch?v=1VmVK2s3aTc', title='ZZ Top - Thunderbird [Official Music Video]', artist='', match_confidence=38.0, skill_id='t.fake', playback=<PlaybackType.VIDEO: 1>, status=<TrackState.DISAMBIGUATION: 1>, media_type=<MediaType.VIDEO: 3>, length=245000, image='https://img.youtube.com/vi/1VmVK2s3aTc/default.jpg', skill_icon='/home/miro/PycharmProjects/skill-ovos-youtube/res/ytube.jpg', javascript='')
-        # MediaEntry(uri='https://www.youtube.com/watch?v=UYriLYygHyA', title='ZZ Top - Blue Jean Blues [Official Audio]', artist='', match_confidence=37.0, skill_id='t.fake', playback=<PlaybackType.VIDEO: 1>, status=<TrackState.DISAMBIGUATION: 1>, media_type=<MediaType.VIDEO: 3>, length=235000, image='https://img.youtube.com/vi/UYriLYygHyA/default.jpg', skill_icon='/home/miro/PycharmProjects/skill-ovos-youtube/res/ytube.jpg', javascript='')
-        # MediaEntry(uri='https://www.youtube.com/watch?v=sUEMVC_-Lag', title='ZZ Top - Brown Sugar [Official Audio]', artist='', match_confidence=36.0, skill_id='t.fake', playback=<PlaybackType.VIDEO: 1>, status=<TrackState.DISAMBIGUATION: 1>, media_type=<MediaType.VIDEO: 3>, length=258000, image='https://img.youtube.com/vi/sUEMVC_-Lag/default.jpg', skill_icon='/home/miro/PycharmProjects/skill-ovos-youtube/res/ytube.jpg', javascript='')
-        # MediaEntry(uri='https://www.youtube.com/watch?v=jnJSJ4UcJWs', title='ZZ Top - Heard It On The X [Official Audio]', artist='', match_confidence=35.0, skill_id='t.fake', playback=<PlaybackType.VIDEO: 1>, status=<TrackState.DISAMBIGUATION: 1>, media_type=<MediaType.VIDEO: 3>, length=171000, image='https://img.youtube.com/vi/jnJSJ4UcJWs/default.jpg', skill_icon='/home/miro/PycharmProjects/skill-ovos-youtube/res/ytube.jpg', javascript='')
-        # MediaEntry(uri='https://www.youtube.com/watch?v=6OPO_S6qtNo', title='ZZ Top - Just Got Paid [Official Audio]', artist='', match_confidence=34.0, skill_id='t.fake', playback=<PlaybackType.VIDEO: 1>, status=<TrackState.DISAMBIGUATION: 1>, media_type=<MediaType.VIDEO: 3>, length=230000, image='https://img.youtube.com/vi/6OPO_S6qtNo/default.jpg', skill_icon='/home/miro/PycharmProjects/skill-ovos-youtube/res/ytube.jpg', javascript='')
-        # MediaEntry(uri='https://www.youtube.com/watch?v=FIuPiX6rzZM', title='ZZ Top - La Grange [Official Audio]', artist='', match_confidence=33.0, skill_id='t.fake', playback=<PlaybackType.VIDEO: 1>, status=<TrackState.DISAMBIGUATION: 1>, media_type=<MediaType.VIDEO: 3>, length=282000, image='https://img.youtube.com/vi/FIuPiX6rzZM/default.jpg', skill_icon='/home/miro/PycharmProjects/skill-ovos-youtube/res/ytube.jpg', javascript='')
-        # MediaEntry(uri='https://www.youtube.com/watch?v=orJvQMWQ3Hs', title='ZZ Top - Legs [Official Audio]', artist='', match_confidence=32.0, skill_id='t.fake', playback=<PlaybackType.VIDEO: 1>, status=<TrackState.DISAMBIGUATION: 1>, media_type=<MediaType.VIDEO: 3>, length=262000, image='https://img.youtube.com/vi/orJvQMWQ3Hs/default.jpg', skill_icon='/home/miro/PycharmProjects/skill-ovos-youtube/res/ytube.jpg', javascript='')
-        # MediaEntry(uri='https://www.youtube.com/watch?v=qeFm6vCaPOk', title='ZZ Top - Thunderbird [Official Audio]', artist='', match_confidence=31.0, skill_id='t.fake', playback=<PlaybackType.VIDEO: 1>, status=<TrackState.DISAMBIGUATION: 1>, media_type=<MediaType.VIDEO: 3>, length=245000, image='https://img.youtube.com/vi/qeFm6vCaPOk/default.jpg', skill_icon='/home/miro/PycharmProjects/skill-ovos-youtube/res/ytube.jpg', javascript='')
-        # MediaEntry(uri='https://www.youtube.com/watch?v=2dK3UQLlXM8', title='ZZ Top - Tush [Official Audio]', artist='', match_confidence=30.0, skill_id='t.fake', playback=<PlaybackType.VIDEO: 1>, status=<TrackState.DISAMBIGUATION: 1>, media_type=<MediaType.VIDEO: 3>, length=151000, image='https://img.youtube.com/vi/2dK3UQLlXM8/default.jpg', skill_icon='/home/miro/PycharmProjects/skill-ovos-youtube/res/ytube.jpg', javascript='')
-        # MediaEntry(uri='https://www.youtube.com/watch?v=yX-7kIbYBhU', title='ZZ Top - Certified Blues [Official Audio]', artist='', match_confidence=29.0, skill_id='t.fake', playback=<PlaybackType.VIDEO: 1>, status=<TrackState.DISAMBIGUATION: 1>, media_type=<MediaType.VIDEO: 3>, length=235000, image='https://img.youtube.com/vi/yX-7kIbYBhU/default.jpg', skill_icon='/home/miro/PycharmProjects/skill-ovos-youtube/res/ytube.jpg', javascript='')
-        # MediaEntry(uri='https://www.youtube.com/watch?v=Vppbdf-qtGU', title='ZZ Top - La Grange', artist='', match_confidence=28.0, skill_id='t.fake', playback=<PlaybackType.VIDEO: 1>, status=<TrackState.DISAMBIGUATION: 1>, media_type=<MediaType.VIDEO: 3>, length=229000, image='https://img.youtube.com/vi/Vppbdf-qtGU/default.jpg', skill_icon='/home/miro/PycharmProjects/skill-ovos-youtube/res/ytube.jpg', javascript='')
-        # MediaEntry(uri='https://www.youtube.com/watch?v=sn1kjlIdIl8', title='Got Me Under Pressure (2008 Remaster)', artist='', match_confidence=-59.04651162790698, skill_id='t.fake', playback=<PlaybackType.VIDEO: 1>, status=<TrackState.DISAMBIGUATION: 1>, media_type=<MediaType.VIDEO: 3>, length=244000, image='https://img.youtube.com/vi/sn1kjlIdIl8/default.jpg', skill_icon='/home/miro/PycharmProjects/skill-ovos-youtube/res/ytube.jpg', javascript='')
-        # MediaEntry(uri='https://www.youtube.com/watch?v=euzlaYW7Qho', title='I Need You Tonight (2008 Remaster)', artist='', match_confidence=-59.0, skill_id='t.fake', playback=<PlaybackType.VIDEO: 1>, status=<TrackState.DISAMBIGUATION: 1>, media_type=<MediaType.VIDEO: 3>, length=379000, image='https://img.youtube.com/vi/euzlaYW7Qho/default.jpg', skill_icon='/home/miro/PycharmProjects/skill-ovos-youtube/res/ytube.jpg', javascript='')
-        # MediaEntry(uri='https://www.youtube.com/watch?v=OorZcOzNcgE', title='Deep Purple - Child In Time - Live (1970)', artist='', match_confidence=-66.11111111111111, skill_id='t.fake', playback=<PlaybackType.VIDEO: 1>, status=<TrackState.DISAMBIGUATION: 1>, media_type=<MediaType.VIDEO: 3>, length=576000, image='https://img.youtube.com/vi/OorZcOzNcgE/default.jpg', skill_icon='/home/miro/PycharmProjects/skill-ovos-youtube/res/ytube.jpg', javascript='')
-        # MediaEntry(uri='https://www.youtube.com/watch?v=yqzUsATxom4', title='Billy F Gibbons: "Missin\' Yo\' Kissin\'" from "The Big Bad Blues"', artist='', match_confidence=-67.30434782608695, skill_id='t.fake', playback=<PlaybackType.VIDEO: 1>, status=<TrackState.DISAMBIGUATION: 1>, media_type=<MediaType.VIDEO: 3>, length=200000, image='https://img.youtube.com/vi/yqzUsATxom4/default.jpg', skill_icon='/home/miro/PycharmProjects/skill-ovos-youtube/res/ytube.jpg', javascript='')
-        # MediaEntry(uri='https://www.youtube.com/watch?v=Mqfwbf3X8SA', title='Lynyrd Skynyrd - Simple Man - Live At The Florida Theatre / 2015 (Official Video)', artist='', match_confidence=-67.58823529411765, skill_id='t.fake', playback=<PlaybackType.VIDEO: 1>, status=<TrackState.DISAMBIGUATION: 1>, media_type=<MediaType.VIDEO: 3>, length=434000, image='https://img.youtube.com/vi/Mqfwbf3X8SA/default.jpg', skill_icon='/home/miro/PycharmProjects/skill-ovos-youtube/res/ytube.jpg', javascript='')
-        # MediaEntry(uri='https://www.youtube.com/watch?v=gOoKzw3JSCM', title='ZZ Top - Viva Las Vegas (Official Music Video)', artist='', match_confidence=22.0, skill_id='t.fake', playback=<PlaybackType.VIDEO: 1>, status=<TrackState.DISAMBIGUATION: 1>, media_type=<MediaType.VIDEO: 3>, length=273000, image='https://img.youtube.com/vi/gOoKzw3JSCM/default.jpg', skill_icon='/home/miro/PycharmProjects/skill-ovos-youtube/res/ytube.jpg', javascript='')
-        # MediaEntry(uri='https://www.youtube.com/watch?v=fjNm4Axtol8', title='ZZ Top Make Their First Appearance on Live Television | Carson Tonight Show', artist='', match_confidence=21.0, skill_id='t.fake', playback=<PlaybackType.VIDEO: 1>, status=<TrackState.DISAMBIGUATION: 1>, media_type=<MediaType.VIDEO: 3>, length=444000, image='https://img.youtube.com/vi/fjNm4Axtol8/default.jpg', skill_icon='/home/miro/PycharmProjects/skill-ovos-youtube/res/ytube.jpg', javascript='')
-        # MediaEntry(uri='https://www.youtube.com/watch?v=bSt4myecN_c', title='La Grange (2005 Remaster)', artist='', match_confidence=-73.54838709677419, skill_id='t.fake', playback=<PlaybackType.VIDEO: 1>, status=<TrackState.DISAMBIGUATION: 1>, media_type=<MediaType.VIDEO: 3>, length=231000, image='https://img.youtube.com/vi/bSt4myecN_c/default.jpg', skill_icon='/home/miro/PycharmProjects/skill-ovos-youtube/res/ytube.jpg', javascript='')
-        # MediaEntry(uri='https://www.youtube.com/watch?v=Pn2-b_opVTo', title='ZZ Top Sharp Dressed Man', artist='', match_confidence=19.0, skill_id='t.fake', playback=<PlaybackType.VIDEO: 1>, status=<TrackState.DISAMBIGUATION: 1>, media_type=<MediaType.VIDEO: 3>, length=253000, image='https://img.youtube.com/vi/Pn2-b_opVTo/default.jpg', skill_icon='/home/miro/PycharmProjects/skill-ovos-youtube/res/ytube.jpg', javascript='')
-        # MediaEntry(uri='https://www.youtube.com/watch?v=6c7d8BYJy8I', title='ZZ Top - Just Got Paid (From "Double Down Live - 1980")', artist='', match_confidence=18.0, skill_id='t.fake', playback=<PlaybackType.VIDEO: 1>, status=<TrackState.DISAMBIGUATION: 1>, media_type=<MediaType.VIDEO: 3>, length=236000, image='https://img.youtube.com/vi/6c7d8BYJy8I/default.jpg', skill_icon='/home/miro/PycharmProjects/skill-ovos-youtube/res/ytube.jpg', javascript='')
-        # MediaEntry(uri='https://www.youtube.com/watch?v=WzU3iR3Wrog', title='Tush (2006 Remaster)', artist='', match_confidence=-67.61538461538461, skill_id='t.fake', playback=<PlaybackType.VIDEO: 1>, status=<TrackState.DISAMBIGUATION: 1>, media_type=<MediaType.VIDEO: 3>, length=134000, image='https://img.youtube.com/vi/WzU3iR3Wrog/default.jpg', skill_icon='/home/miro/PycharmProjects/skill-ovos-youtube/res/ytube.jpg', javascript='')
-        # MediaEntry(uri='https://www.youtube.com/watch?v=eCUCSqcSnac', title='ZZ Top - Tube Snake Boogie (Official Music Video)', artist='', match_confidence=16.0, skill_id='t.fake', playback=<PlaybackType.VIDEO: 1>, status=<TrackState.DISAMBIGUATION: 1>, media_type=<MediaType.VIDEO: 3>, length=173000, image='https://img.youtube.com/vi/eCUCSqcSnac/default.jpg', skill_icon='/home/miro/PycharmProjects/skill-ovos-youtube/res/ytube.jpg', javascript='')
-        # MediaEntry(uri='https://www.youtube.com/watch?v=gf7ze6vcS_8', title="ZZ Top - I'm Bad I'm Nationwide (Official Music Video)", artist='', match_confidence=15.0, skill_id='t.fake', playback=<PlaybackType.VIDEO: 1>, status=<TrackState.DISAMBIGUATION: 1>, media_type=<MediaType.VIDEO: 3>, length=272000, image='https://img.youtube.com/vi/gf7ze6vcS_8/default.jpg', skill_icon='/home/miro/PycharmProjects/skill-ovos-youtube/res/ytube.jpg', javascript='')
-        # MediaEntry(uri='https://www.youtube.com/watch?v=mB3SOEsk3zw', title='ZZ Top - Sharp Dressed Man (Live)', artist='', match_confidence=14.0, skill_id='t.fake', playback=<PlaybackType.VIDEO: 1>, status=<TrackState.DISAMBIGUATION: 1>, media_type=<MediaType.VIDEO: 3>, length=265000, image='https://img.youtube.com/vi/mB3SOEsk3zw/default.jpg', skill_icon='/home/miro/PycharmProjects/skill-ovos-youtube/res/ytube.jpg', javascript='')
-        # MediaEntry(uri='https://www.youtube.com/watch?v=WUnp0xPF6zw', title='Sharp Dressed Man (2019 Remaster)', artist='', match_confidence=-76.74358974358974, skill_id='t.fake', playback=<PlaybackType.VIDEO: 1>, status=<TrackState.DISAMBIGUATION: 1>, media_type=<MediaType.VIDEO: 3>, length=253000, image='https://img.youtube.com/vi/WUnp0xPF6zw/default.jpg', skill_icon='/home/miro/PycharmProjects/skill-ovos-youtube/res/ytube.jpg', javascript='')
-        # MediaEntry(uri='https://www.youtube.com/watch?v=-Ifs9nZRSSw', title="I'm Bad, I'm Nationwide", artist='', match_confidence=-72.0, skill_id='t.fake', playback=<PlaybackType.VIDEO: 1>, status=<TrackState.DISAMBIGUATION: 1>, media_type=<MediaType.VIDEO: 3>, length=287000, image='https://img.youtube.com/vi/-Ifs9nZRSSw/default.jpg', skill_icon='/home/miro/PycharmProjects/skill-ovos-youtube/res/ytube.jpg', javascript='')
-        # MediaEntry(uri='https://www.youtube.com/watch?v=JIrhcOIYfA8', title="ZZ Top- I'm Bad, I'm Nationwide (lyrics)", artist='', match_confidence=-39.0, skill_id='t.fake', playback=<PlaybackType.VIDEO: 1>, status=<TrackState.DISAMBIGUATION: 1>, media_type=<MediaType.VIDEO: 3>, length=284000, image='https://img.youtube.com/vi/JIrhcOIYfA8/default.jpg', skill_icon='/home/miro/PycharmProjects/skill-ovos-youtube/res/ytube.jpg', javascript='')
-        # MediaEntry(uri='https://www.youtube.com/watch?v=UvoyWlnvVxw', title='LIVE!!! ZZ Top   "Waitin\' for the Bus"/Jesus Just Left Chicago " 2010', artist='', match_confidence=10.0, skill_id='t.fake', playback=<PlaybackType.VIDEO: 1>, status=<TrackState.DISAMBIGUATION: 1>, media_type=<MediaType.VIDEO: 3>, length=459000, image='https://img.youtube.com/vi/UvoyWlnvVxw/default.jpg', skill_icon='/home/miro/PycharmProjects/skill-ovos-youtube/res/ytube.jpg', javascript='')
-        # MediaEntry(uri='https://www.youtube.com/watch?v=SE1xO44FlME', title='ZZ Top La Grange live 1982', artist='', match_confidence=9.0, skill_id='t.fake', playback=<PlaybackType.VIDEO: 1>, status=<TrackState.DISAMBIGUATION: 1>, media_type=<MediaType.VIDEO: 3>, length=277000, image='https://img.youtube.com/vi/SE1xO44FlME/default.jpg', skill_icon='/home/miro/PycharmProjects/skill-ovos-youtube/res/ytube.jpg', javascript='')
-        # MediaEntry(uri='https://www.youtube.com/watch?v=TKJymx2KDWo', title='ZZ Top - Sleeping Bag (Official Music Video)', artist='', match_confidence=8.0, skill_id='t.fake', playback=<PlaybackType.VIDEO: 1>, status=<TrackState.DISAMBIGUATION: 1>, media_type=<MediaType.VIDEO: 3>, length=268000, image='https://img.youtube.com/vi/TKJymx2KDWo/default.jpg', skill_icon='/home/miro/PycharmProjects/skill-ovos-youtube/res/ytube.jpg', javascript='')
-        # MediaEntry(uri='https://www.youtube.com/watch?v=sYDo9zuvaOY', title='Beer Drinkers & Hell Raisers (2006 Remaster)', artist='', match_confidence=-89.0, skill_id='t.fake', playback=<PlaybackType.VIDEO: 1>, status=<TrackState.DISAMBIGUATION: 1>, media_type=<MediaType.VIDEO: 3>, length=206000, image='https://img.youtube.com/vi/sYDo9zuvaOY/default.jpg', skill_icon='/home/miro/PycharmProjects/skill-ovos-youtube/res/ytube.jpg', javascript='')
-        # MediaEntry(uri='https://www.youtube.com/watch?v=yWMnxyIhCDw', title='ZZ Top “La Grange” on the Howard Stern Show', artist='', match_confidence=6.0, skill_id='t.fake', playback=<PlaybackType.VIDEO: 1>, status=<TrackState.DISAMBIGUATION: 1>, media_type=<MediaType.VIDEO: 3>, length=477000, image='https://img.youtube.com/vi/yWMnxyIhCDw/default.jpg', skill_icon='/home/miro/PycharmProjects/skill-ovos-youtube/res/ytube.jpg', javascript='')
-        # MediaEntry(uri='https://www.youtube.com/watch?v=ISveIzgq_kQ', title='ZZ Top - Got Me Under Pressure (Live)', artist='', match_confidence=5.0, skill_id='t.fake', playback=<PlaybackType.VIDEO: 1>, status=<TrackState.DISAMBIGUATION: 1>, media_type=<MediaType.VIDEO: 3>, length=242000, image='https://img.youtube.com/vi/ISveIzgq_kQ/default.jpg', skill_icon='/home/miro/PycharmProjects/skill-ovos-youtube/res/ytube.jpg', javascript='')
-        # MediaEntry(uri='https://www.youtube.com/watch?v=euZm1TfO9xY', title='ZZ Top - La Grange - Tush  [Live] "Crossroads Guitar Festival 2004"', artist='', match_confidence=4.0, skill_id='t.fake', playback=<PlaybackType.VIDEO: 1>, status=<TrackState.DISAMBIGUATION: 1>, media_type=<MediaType.VIDEO: 3>, length=554000, image='https://img.youtube.com/vi/euZm1TfO9xY/default.jpg', skill_icon='/home/miro/PycharmProjects/skill-ovos-youtube/res/ytube.jpg', javascript='')
\ No newline at end of file
+                    if isinstance(v, VideoResult):
+                        start = time.perf_counter()
+                        score = scorer.video_score(
+                            v.title, idx, base_score=base_score,
+                            explicit_request=explicit_request)
+                        metrics.add("scoring", time.perf_counter() - start)
+                        rank = idx
+                        idx += 1
+                        if best_score is None or score >= best_score:
+                            best_score, settled = score, rank
+                        if v.uri in seen and seen[v.uri] >= score:
+                            continue  # already answered from the local index
+                        if min_conf is not None and score < min_conf:
+                            self.search_stats["min_confidence"] += 1
+                            continue
+                        if not best.offer(score):
+                            # not among the best results, never built
+                            self.search_stats["max_results"] += 1
+                            continue
+                        start = time.perf_counter()
+                        resolve = self._prefetch_stream(top, v, score)
+                        entry = self._video_entry(v, score, resolve)
+                        self._remember_rank(entry.uri, pattern, rank)
+                        self._prefetch_thumbnail(top_thumbs, v.image, score)
+                    elif isinstance(v, ChannelResult):
+                        start = time.perf_counter()
+                        # rank in the search results, not arrival order
+                        rank = idx if v.rank is None else v.rank
+                        score = scorer.channel_score(
+                            v.title, rank, base_score=base_score,
+                            explicit_request=explicit_request)
+                        if best_score is None or score >= best_score:
+                            best_score, settled = score, rank
+                        if min_conf is not None and score < min_conf:
+                            metrics.add("scoring",
+                                        time.perf_counter() - start)
+                            self.search_stats["min_confidence"] += 1
+                            continue
+                        if not best.offer(score):
+                            metrics.add("scoring",
+                                        time.perf_counter() - start)
+                            self.search_stats["max_results"] += 1
+                            continue
+                        # scored by their index in the channel page
+                        positions = v.positions or range(len(v.videos))
+                        scores = scorer.video_scores(
+                            [cv.title for cv in v.videos],
+                            positions=list(positions))
+                        metrics.add("scoring", time.perf_counter() - start)
+                        start = time.perf_counter()
+                        # create playlist (list of track dicts)
+                        entry = Playlist(
+                            match_confidence=score,
+                            playback=PlaybackType.VIDEO,
+                            media_type=MediaType.VIDEO,
+                            image=self._thumbnail(v.image),
+                            title=v.title + " (Youtube Channel)",
+                            skill_id=self.skill_id,
+                            skill_icon=self.skill_icon
+                        )
+                        if not v.videos and v.url:
+                            # lazy channel, resolved in play_channel
+                            entry.append(MediaEntry(
+                                uri=CHANNEL_URI + v.url,
+                                match_confidence=score,
+                                playback=PlaybackType.SKILL,
+                                media_type=MediaType.VIDEO,
+                                image=entry.image,
+                                title=entry.title,
+                                skill_id=self.skill_id,
+                                skill_icon=self.skill_icon
+                            ))
+                        for cv, cv_score, pos in zip(v.videos, scores,
+                                                     positions):
+                            video = self._video_entry(cv, cv_score)
+                            self._remember_rank(video.uri, pattern, rank,
+                                                pos)
+                            entry.append(video)
+                        self._prefetch_thumbnail(top_thumbs, v.image, score)
+                    else:
+                        continue
+
+                    metrics.add("build", time.perf_counter() - start)
+                    metrics.add_result()
+                    yield entry
+
+                    if score >= early_conf:
+                        confident += 1
+                        if early_count and confident >= early_count:
+                            self._search_cutoff(metrics, "early_exit")
+                            break
+        finally:
+            self._report_metrics(metrics)
+            # a search cut short never saw where the best score settled
+            if best_score is not None and metrics.cutoff is None:
+                self._record_depth(pattern, SETTLED, settled)
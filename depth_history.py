@@ -0,0 +1,77 @@
+import sqlite3
+import time
+from contextlib import closing
+from threading import Lock
+from typing import List, Optional
+
+# sample kinds
+SELECTED = "selected"  # rank of the result the user played
+SETTLED = "settled"  # last rank that reached the top score
+CHANNEL = "channel"  # position of the played video inside a channel
+
+
+class DepthHistory:
+    """ bounded sqlite store of how deep past searches had to go
+
+    samples are kept per query pattern, only the most recent
+    `samples` per pattern and `max_entries` overall are kept
+    """
+
+    def __init__(self, path: str, max_entries: int = 2000,
+                 samples: int = 20):
+        self.path = path
+        self.max_entries = max_entries
+        self.samples = samples
+        self._lock = Lock()
+        with self._connect() as db:
+            db.execute("CREATE TABLE IF NOT EXISTS samples ("
+                       "id INTEGER PRIMARY KEY, "
+                       "pattern TEXT NOT NULL, "
+                       "kind TEXT NOT NULL, "
+                       "value INTEGER NOT NULL, "
+                       "created REAL NOT NULL)")
+            db.execute("CREATE INDEX IF NOT EXISTS samples_pattern "
+                       "ON samples (pattern, kind, id)")
+            db.commit()
+
+    def _connect(self):
+        return closing(sqlite3.connect(self.path, timeout=10))
+
+    def add(self, pattern: str, kind: str, value: int):
+        with self._lock, self._connect() as db:
+            db.execute("INSERT INTO samples (pattern, kind, value, created) "
+                       "VALUES (?, ?, ?, ?)",
+                       (pattern, kind, value, time.time()))
+            db.execute("DELETE FROM samples WHERE pattern = ? AND kind = ? "
+                       "AND id NOT IN (SELECT id FROM samples "
+                       "WHERE pattern = ? AND kind = ? "
+                       "ORDER BY id DESC LIMIT ?)",
+                       (pattern, kind, pattern, kind, self.samples))
+            db.execute("DELETE FROM samples WHERE id NOT IN ("
+                       "SELECT id FROM samples ORDER BY id DESC LIMIT ?)",
+                       (self.max_entries,))
+            db.commit()
+
+    def values(self, pattern: str, kind: str) -> List[int]:
+        with self._lock, self._connect() as db:
+            rows = db.execute("SELECT value FROM samples "
+                              "WHERE pattern = ? AND kind = ? "
+                              "ORDER BY id DESC LIMIT ?",
+                              (pattern, kind, self.samples)).fetchall()
+        return [r[0] for r in rows]
+
+    def clear(self):
+        with self._lock, self._connect() as db:
+            db.execute("DELETE FROM samples")
+            db.commit()
+
+
+def learned_depth(values: List[int], cap: int, min_samples: int = 3,
+                  margin: int = 2, floor: int = 1) -> Optional[int]:
+    """ depth covering 90% of the past samples plus a margin,
+    None if there is not enough history to decide """
+    if len(values) < min_samples:
+        return None
+    values = sorted(values)
+    p90 = values[min(len(values) - 1, int(len(values) * 0.9))]
+    return max(floor, min(cap, p90 + 1 + margin))
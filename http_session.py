@@ -0,0 +1,163 @@
+import json
+import random
+import time
+from collections import Counter
+from threading import Lock
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from ovos_utils.log import LOG
+
+
+class TokenBucket:
+    """ allows `rate` requests per second on average, in bursts of up to
+    `burst` requests """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+        self._lock = Lock()
+
+    def acquire(self) -> float:
+        """ take a token, sleeping until one is available,
+        returns the seconds waited """
+        if self.rate <= 0:  # unlimited
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst,
+                               self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= 1
+            # a negative balance is the queue of callers waiting for tokens
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+        return wait
+
+
+class YoutubeSession:
+    """ one pooled keep-alive http session for every youtube request
+
+    requests go through a token bucket rate limiter and responses with
+    status 429 or 5xx are retried with jittered exponential backoff,
+    honoring Retry-After when youtube sends it
+    """
+
+    def __init__(self, rate: float = 5, burst: int = 10,
+                 max_connections: int = 10, retries: int = 3,
+                 backoff: float = 0.5, max_backoff: float = 8):
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.bucket = TokenBucket(rate, burst)
+        self.stats = Counter()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4,
+                              pool_maxsize=max_connections,
+                              pool_block=True)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _delay(self, attempt: int, response) -> float:
+        retry_after = response.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            return min(float(retry_after), self.max_backoff)
+        # "full jitter", spreads out retries from many devices
+        return random.uniform(0, min(self.max_backoff,
+                                     self.backoff * 2 ** attempt))
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        for attempt in range(self.retries + 1):
+            waited = self.bucket.acquire()
+            if waited:
+                self.stats["throttled"] += 1
+            response = self.session.request(method, url, **kwargs)
+            self.stats["requests"] += 1
+            if response.status_code != 429 and response.status_code < 500:
+                return response
+            if attempt == self.retries:
+                break
+            delay = self._delay(attempt, response)
+            self.stats["retries"] += 1
+            LOG.debug(f"youtube answered {response.status_code}, "
+                      f"retrying in {delay:.2f}s")
+            time.sleep(delay)
+        return response
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+
+class _RequestsShim:
+    """ stands in for the requests module inside tutubo.channel """
+
+    def __init__(self, session: YoutubeSession):
+        self._session = session
+
+    def get(self, url, **kwargs):
+        return self._session.get(url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self._session.post(url, **kwargs)
+
+    def __getattr__(self, item):
+        return getattr(requests, item)
+
+
+_session: Optional[YoutubeSession] = None
+
+
+def install_session(**kwargs) -> Optional[YoutubeSession]:
+    """ route tutubo search and channel requests through a process wide
+    YoutubeSession, returns None if tutubo can not be patched
+
+    tutubo has no hook for a custom session, search requests are made by
+    tutubo._innertube._post (urllib) and channel pages by the requests
+    module imported in tutubo.channel, both are replaced here
+    """
+    global _session
+    if _session:
+        return _session
+    from tutubo import _innertube, channel
+    if not hasattr(_innertube, "_post") or \
+            getattr(channel, "requests", None) is not requests:
+        LOG.warning("unsupported tutubo version, "
+                    "not using a shared http session")
+        return None
+    session = YoutubeSession(**kwargs)
+
+    def _post(endpoint: str, params: dict, body: dict) -> dict:
+        url = f"{_innertube._BASE_URL}/{endpoint}"
+        try:
+            response = session.post(url, params=params, json=body,
+                                    headers=_innertube._HEADERS, timeout=30)
+            response.raise_for_status()
+            result = response.json()
+        except requests.HTTPError as e:
+            raise RuntimeError(f"YouTube API returned HTTP "
+                               f"{e.response.status_code} for {endpoint}"
+                               ) from e
+        except (requests.RequestException, json.JSONDecodeError) as e:
+            raise RuntimeError(f"Network error calling YouTube API: {e}"
+                               ) from e
+        if _innertube._RECORD_DIR:
+            query = body.get("query") or params.get("query") or \
+                body.get("continuation", "continuation")
+            _innertube._save_fixture(f"{endpoint}_{query.lower()[:60]}",
+                                     result)
+        return result
+
+    _innertube._post = _post
+    channel.requests = _RequestsShim(session)
+    _session = session
+    return session
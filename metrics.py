@@ -0,0 +1,137 @@
+import os
+import time
+from collections import defaultdict
+from threading import Lock
+from typing import Optional
+
+# histogram buckets in seconds
+BUCKETS = (0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class SearchMetrics:
+    """ per stage timings of a single search, all durations in seconds
+
+    stages:
+        index - searching and scoring the local index of seen videos
+        fetch - waiting on tutubo for search pages (http + parsing)
+        channel_wait - waiting for channel pages after the search ended
+        scoring - calculating match confidence
+        build - creating MediaEntry/Playlist objects
+    """
+
+    def __init__(self, phrase: str = ""):
+        self.phrase = phrase
+        self.start = time.perf_counter()
+        self.stages = defaultdict(float)
+        self.first_result: Optional[float] = None
+        self.results = 0
+        self.channel_fetches = 0
+        self.channel_time = 0.0
+        self.cache = "disabled"
+        self.coalesced = False  # joined an identical search already in flight
+        self.cutoff: Optional[str] = None
+        self._lock = Lock()
+
+    def add(self, stage: str, elapsed: float):
+        self.stages[stage] += elapsed
+
+    def add_channel(self, elapsed: float):
+        # called from the channel thread pool
+        with self._lock:
+            self.channel_fetches += 1
+            self.channel_time += elapsed
+
+    def add_result(self):
+        if self.first_result is None:
+            self.first_result = time.perf_counter() - self.start
+        self.results += 1
+
+    def as_dict(self) -> dict:
+        return {"phrase": self.phrase,
+                "total": time.perf_counter() - self.start,
+                "first_result": self.first_result,
+                "results": self.results,
+                "channel_fetches": self.channel_fetches,
+                "channel_time": self.channel_time,
+                "cache": self.cache,
+                "coalesced": self.coalesced,
+                "cutoff": self.cutoff,
+                "stages": dict(self.stages)}
+
+
+def timed(iterable, metrics: SearchMetrics, stage: str):
+    """ yield from iterable, adding the time spent waiting on it to stage """
+    it = iter(iterable)
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(it)
+        except StopIteration:
+            return
+        finally:
+            metrics.add(stage, time.perf_counter() - start)
+        yield item
+
+
+class PrometheusTextfile:
+    """ aggregates search metrics into histograms and writes them in the
+    prometheus text format, for node_exporter's textfile collector """
+
+    def __init__(self, path: str, prefix: str = "ovos_youtube_search"):
+        self.path = path
+        self.prefix = prefix
+        self.counters = defaultdict(float)
+        # name -> [bucket counts..., sum, count]
+        self.histograms = defaultdict(lambda: [0] * len(BUCKETS) + [0.0, 0])
+        self._lock = Lock()
+
+    def _observe(self, name: str, value: float):
+        h = self.histograms[name]
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                h[i] += 1
+        h[-2] += value
+        h[-1] += 1
+
+    def observe(self, metrics: dict):
+        with self._lock:
+            self.counters["searches_total"] += 1
+            self.counters["results_total"] += metrics["results"]
+            self.counters["channel_fetches_total"] += metrics["channel_fetches"]
+            self.counters[f'cache_total{{status="{metrics["cache"]}"}}'] += 1
+            if metrics.get("coalesced"):
+                self.counters["coalesced_total"] += 1
+            if metrics["cutoff"]:
+                self.counters[f'cutoff_total{{reason="{metrics["cutoff"]}"}}'] += 1
+            self._observe("duration_seconds", metrics["total"])
+            if metrics["first_result"] is not None:
+                self._observe("first_result_seconds", metrics["first_result"])
+            if metrics["channel_fetches"]:
+                self._observe("channel_seconds", metrics["channel_time"] /
+                              metrics["channel_fetches"])
+            for stage, elapsed in metrics["stages"].items():
+                self._observe(f'stage_seconds{{stage="{stage}"}}', elapsed)
+            self.write()
+
+    def _lines(self):
+        for name, value in sorted(self.counters.items()):
+            yield f"{self.prefix}_{name} {value}"
+        for name, h in sorted(self.histograms.items()):
+            # split 'name{labels}' so le can be added to the labels
+            base, _, labels = name.partition("{")
+            labels = labels.rstrip("}")
+            sep = "," if labels else ""
+            for bound, count in zip(BUCKETS, h):
+                yield (f'{self.prefix}_{base}_bucket'
+                       f'{{{labels}{sep}le="{bound}"}} {count}')
+            yield f'{self.prefix}_{base}_bucket{{{labels}{sep}le="+Inf"}} {h[-1]}'
+            suffix = f"{{{labels}}}" if labels else ""
+            yield f"{self.prefix}_{base}_sum{suffix} {h[-2]}"
+            yield f"{self.prefix}_{base}_count{suffix} {h[-1]}"
+
+    def write(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            f.write("\n".join(self._lines()) + "\n")
+        # atomic, the collector never sees a partial file
+        os.replace(tmp, self.path)
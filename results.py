@@ -0,0 +1,92 @@
+from typing import List, NamedTuple, Optional, Tuple
+
+
+class VideoResult(NamedTuple):
+    """ compact metadata for a single youtube video """
+    uri: str
+    title: str
+    length: int = 0  # seconds
+    image: str = ""
+    channel: str = ""
+
+
+class ChannelResult(NamedTuple):
+    """ compact metadata for a youtube channel and its latest videos """
+    title: str
+    image: str = ""
+    url: str = ""
+    videos: Tuple[VideoResult, ...] = ()
+    # index of each video in the channel page, skipped videos included
+    positions: Tuple[int, ...] = ()
+    # videos before the channel in the search results, channels are
+    # parsed in the background and arrive later than that
+    rank: Optional[int] = None
+
+
+def video_from_tutubo(v, channel: str = "") -> VideoResult:
+    if not channel:
+        try:
+            channel = v.author
+        except (AttributeError, KeyError, IndexError):
+            channel = ""
+    return VideoResult(uri=v.watch_url,
+                       title=v.title,
+                       length=getattr(v, "length", 0) or 0,
+                       image=v.thumbnail_url,
+                       channel=channel)
+
+
+def channel_from_tutubo(ch, url: str = "", max_vids: int = 5) \
+        -> ChannelResult:
+    """ parse a tutubo Channel page into a ChannelResult """
+    videos = []
+    positions = []
+    for vidx, cv in enumerate(ch.videos):
+        if "patreon" in cv.title.lower():  # TODO blacklist.voc
+            continue
+        videos.append(video_from_tutubo(cv, channel=ch.title))
+        positions.append(vidx)
+        if vidx > max_vids:
+            break
+    return ChannelResult(title=ch.title,
+                         image=ch.thumbnail_url,
+                         url=url,
+                         videos=tuple(videos),
+                         positions=tuple(positions))
+
+
+def result_to_dict(r) -> dict:
+    """ serialize a search result into a json friendly dict """
+    if isinstance(r, ChannelResult):
+        return {"type": "channel",
+                "title": r.title,
+                "image": r.image,
+                "url": r.url,
+                "videos": [v._asdict() for v in r.videos],
+                "positions": list(r.positions),
+                "rank": r.rank}
+    return {"type": "video", **r._asdict()}
+
+
+def in_stream_order(results: List) -> List:
+    """ put channels back at their rank between the videos """
+    keyed = []
+    videos = 0
+    for i, r in enumerate(results):
+        if isinstance(r, ChannelResult):
+            rank = videos if r.rank is None else r.rank
+            keyed.append(((rank, 0, i), r))
+        else:
+            keyed.append(((videos, 1, i), r))
+            videos += 1
+    return [r for _, r in sorted(keyed, key=lambda k: k[0])]
+
+
+def result_from_dict(data: dict):
+    """ inverse of result_to_dict """
+    data = dict(data)
+    if data.pop("type", "video") == "channel":
+        videos = tuple(VideoResult(**v) for v in data.pop("videos", []))
+        positions = tuple(data.pop("positions", ()))
+        return ChannelResult(videos=videos, positions=positions, **data)
+    return VideoResult(**data)
@@ -0,0 +1,133 @@
+import heapq
+import re
+import string
+import unicodedata
+from typing import List, Optional, Pattern
+
+from ovos_utils.parse import fuzzy_match, MatchStrategy
+
+try:
+    from rapidfuzz import fuzz, process
+except ImportError:
+    process = None
+
+_PUNCT = {ord(c): None for c in string.punctuation if c not in ("{", "}")}
+
+
+def remove_accents_and_punct(text: str) -> str:
+    """ same output as ovos_utils.text_utils.remove_accents_and_punct,
+    but without a per character scan of the punctuation list """
+    text = unicodedata.normalize("NFD", text)
+    if not text.isascii():
+        text = "".join(c for c in text if unicodedata.category(c) != "Mn")
+    return text.translate(_PUNCT)
+
+
+def compile_voc_matcher(vocs: List[str]) -> Optional[Pattern]:
+    """ compile a .voc file into a single regex
+
+    matches the same strings as OVOSSkill.voc_match(utt, voc)
+    """
+    vocs = [remove_accents_and_punct(v) for v in vocs if v]
+    if not vocs:
+        return None
+    return re.compile(r"\b(?:" + "|".join(re.escape(v) for v in vocs) + r")\b",
+                      re.IGNORECASE)
+
+
+class SearchScorer:
+    """ scores youtube titles against a single search phrase
+
+    the phrase is normalized once per search and titles can be scored in
+    batches, results are identical to calling fuzzy_match per title
+    """
+
+    def __init__(self, phrase: str, official: Optional[Pattern] = None,
+                 fallback_mode: bool = False):
+        self.phrase = phrase.lower()
+        self.official = official
+        self.fallback_mode = fallback_mode
+
+    def fuzzy_scores(self, titles: List[str]) -> List[float]:
+        """ TOKEN_SET_RATIO of every title, scaled to 0-100 """
+        titles = [t.lower() for t in titles]
+        if process is None:
+            return [100 * fuzzy_match(self.phrase, t,
+                                      strategy=MatchStrategy.TOKEN_SET_RATIO)
+                    for t in titles]
+        scores = [0.0] * len(titles)
+        for _, score, i in process.extract(self.phrase, titles,
+                                           scorer=fuzz.token_set_ratio,
+                                           limit=None):
+            # same float ops as fuzzy_match so scores are identical
+            scores[i] = 100 * (score / 100)
+        return scores
+
+    def is_official(self, title: str) -> bool:
+        if not title or self.official is None:
+            return False
+        return bool(self.official.search(remove_accents_and_punct(title)))
+
+    def channel_score(self, title: str, idx=0, explicit_request=False,
+                      base_score=0, fuzzy: Optional[float] = None) -> float:
+        # idx represents the order from youtube
+        score = base_score - idx  # - 1% as we go down the results list
+
+        if fuzzy is None:
+            fuzzy = self.fuzzy_scores([title])[0]
+        score += fuzzy
+
+        # youtube gives pretty high scores in general, so we allow it
+        # to run as fallback mode, which assigns lower scores and gives
+        # preference to matches from other skills
+        if self.fallback_mode:
+            if not explicit_request:
+                score -= 25
+        return min(100, score)
+
+    def video_score(self, title: str, idx=0, explicit_request=False,
+                    base_score=0, fuzzy: Optional[float] = None) -> float:
+        # shared logic
+        score = self.channel_score(title, idx, explicit_request,
+                                   base_score, fuzzy)
+
+        # the title says its official!
+        if self.is_official(title):
+            score += 5
+
+        return min(100, score)
+
+    def video_scores(self, titles: List[str], explicit_request=False,
+                     base_score=0, positions: Optional[List[int]] = None) \
+            -> List[float]:
+        """ score a list of titles in one pass, idx is the list position
+        unless the original positions are given """
+        if not positions:
+            positions = range(len(titles))
+        return [self.video_score(t, idx, explicit_request, base_score, fuzzy)
+                for idx, t, fuzzy in zip(positions, titles,
+                                         self.fuzzy_scores(titles))]
+
+
+class TopK:
+    """ running top k of a stream of scores
+
+    offer() tells if a score is among the k best seen so far, results
+    that are not are dropped before a MediaEntry is built for them
+    """
+    __slots__ = ("k", "_heap")
+
+    def __init__(self, k: int):
+        self.k = k
+        self._heap: List[float] = []  # min heap, _heap[0] is the cutoff
+
+    def offer(self, score: float) -> bool:
+        if self.k <= 0:  # no limit
+            return True
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, score)
+            return True
+        if score > self._heap[0]:
+            heapq.heapreplace(self._heap, score)
+            return True
+        return False
@@ -0,0 +1,79 @@
+"""allocations and bus payload of SimpleYoutubeSkill.search_youtube
+with and without the max_results top-k stage
+
+replays the recorded fixtures in scripts/fixtures, no network needed,
+exits non-zero when a --max-* threshold is not met by the max_results run
+
+    python scripts/benchmark_allocations.py --max-results 10
+    python scripts/benchmark_allocations.py --max-payload-kib 8
+"""
+import argparse
+import json
+import sys
+import tracemalloc
+
+from ovos_utils.fakebus import FakeBus
+from ovos_utils.ocp import MediaType
+
+from youtube_replay import load_skill_module, load_fixtures, \
+    replay_youtube, isolated_data_dir
+
+
+def measure(skill, query):
+    tracemalloc.start()
+    results = list(skill.search_youtube(query, MediaType.VIDEO))
+    snapshot = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    blocks = sum(s.count for s in snapshot.statistics("filename"))
+    # what OCP receives on the bus for this search
+    payload = len(json.dumps([r.as_dict for r in results]))
+    return len(results), blocks, peak, payload
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--max-results", type=int, default=10)
+    parser.add_argument("--max-blocks", type=int)
+    parser.add_argument("--max-peak-kib", type=float)
+    parser.add_argument("--max-payload-kib", type=float)
+    args = parser.parse_args()
+
+    data_dir = isolated_data_dir()  # removed at exit
+    module = load_skill_module()
+    skill = module.SimpleYoutubeSkill(bus=FakeBus(),
+                                      skill_id="benchmark.youtube")
+    skill.settings["cache_enabled"] = False
+    skill.settings["local_index"] = False
+    skill.settings["adaptive_depth"] = False
+    queries = [f["query"] for f in load_fixtures().values()]
+
+    failures = []
+    with replay_youtube(module):
+        for q in queries:
+            for max_results in (0, args.max_results):
+                skill.settings["max_results"] = max_results
+                n, blocks, peak, payload = measure(skill, q)
+                print(f"'{q}' max_results={max_results}: {n} results, "
+                      f"{blocks} live blocks, peak {peak / 1024:.1f} KiB, "
+                      f"bus payload {payload / 1024:.1f} KiB")
+                if not n:
+                    failures.append(f"'{q}' max_results={max_results}: "
+                                    f"no results")
+                if max_results != args.max_results:
+                    continue
+                if args.max_blocks is not None and blocks > args.max_blocks:
+                    failures.append(f"'{q}': {blocks} live blocks > "
+                                    f"{args.max_blocks}")
+                if args.max_peak_kib is not None and \
+                        peak / 1024 > args.max_peak_kib:
+                    failures.append(f"'{q}': peak {peak / 1024:.1f} KiB > "
+                                    f"{args.max_peak_kib} KiB")
+                if args.max_payload_kib is not None and \
+                        payload / 1024 > args.max_payload_kib:
+                    failures.append(f"'{q}': bus payload "
+                                    f"{payload / 1024:.1f} KiB > "
+                                    f"{args.max_payload_kib} KiB")
+    skill.shutdown()
+    if failures:
+        sys.exit("FAILED\n" + "\n".join(failures))
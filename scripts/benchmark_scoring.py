@@ -0,0 +1,62 @@
+"""micro-benchmark for the search scoring path
+
+compares scoring titles one at a time (fuzzy_match + voc_match per title,
+as the skill used to do) against the batched SearchScorer
+"""
+import random
+import re
+import sys
+import timeit
+from os.path import dirname
+
+from ovos_utils.parse import fuzzy_match, MatchStrategy
+from ovos_utils.text_utils import remove_accents_and_punct
+
+sys.path.insert(0, dirname(dirname(__file__)))
+from scoring import SearchScorer, compile_voc_matcher
+
+with open(f"{dirname(dirname(__file__))}/locale/en-us/official.voc") as f:
+    OFFICIAL = [l.strip() for l in f if l.strip() and not l.startswith("#")]
+
+WORDS = ["zz", "top", "la", "grange", "official", "music", "video", "live",
+         "tush", "legs", "remaster", "[Official Audio]", "lyrics", "HD"]
+PHRASE = "zz top la grange"
+N_TITLES = 50
+
+
+def voc_match(utt, vocs):
+    # same logic as OVOSSkill.voc_match
+    utt = remove_accents_and_punct(utt)
+    vocs = [remove_accents_and_punct(v) for v in vocs]
+    return any([re.match(r'.*\b' + re.escape(i) + r'\b.*', utt, re.IGNORECASE)
+                for i in vocs])
+
+
+def score_one_by_one(titles):
+    scores = []
+    for idx, t in enumerate(titles):
+        score = -idx + 100 * fuzzy_match(PHRASE.lower(), t.lower(),
+                                         strategy=MatchStrategy.TOKEN_SET_RATIO)
+        if voc_match(t, OFFICIAL):
+            score += 5
+        scores.append(min(100, score))
+    return scores
+
+
+def score_batched(titles):
+    scorer = SearchScorer(PHRASE, compile_voc_matcher(OFFICIAL))
+    return scorer.video_scores(titles)
+
+
+if __name__ == "__main__":
+    random.seed(42)
+    titles = [" ".join(random.choices(WORDS, k=random.randint(2, 8)))
+              for _ in range(N_TITLES)]
+    assert score_one_by_one(titles) == score_batched(titles)
+
+    runs = 200
+    for name, func in [("one by one", score_one_by_one),
+                       ("batched", score_batched)]:
+        total = min(timeit.repeat(lambda: func(titles), number=runs, repeat=5))
+        per_result = total / (runs * N_TITLES) * 1e6
+        print(f"{name:>12}: {per_result:.2f} us per result")
@@ -0,0 +1,137 @@
+"""offline benchmark of SimpleYoutubeSkill.search_youtube
+
+replays the recorded fixtures in scripts/fixtures, no network needed,
+exits non-zero when a --max-*/--min-* threshold is not met
+
+    python scripts/benchmark_search.py --page-latency 0.3 --channel-latency 0.8
+    python scripts/benchmark_search.py --max-total-ms 50 --max-peak-kib 2048
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+from statistics import mean
+
+from ovos_utils.fakebus import FakeBus
+from ovos_utils.ocp import MediaType
+from tutubo.models import ChannelPreview
+
+from youtube_replay import load_skill_module, load_fixtures, \
+    replay_youtube, isolated_data_dir
+
+
+def timed_search(skill, query):
+    start = time.perf_counter()
+    first = None
+    n = 0
+    for _ in skill.search_youtube(query, MediaType.VIDEO):
+        if first is None:
+            first = time.perf_counter() - start
+        n += 1
+    return first or 0, time.perf_counter() - start, n
+
+
+def bench_latency(skill, queries, runs):
+    """ returns {query: (results, first result ms, total ms)} """
+    latency = {}
+    for q in queries:
+        first, total, n = zip(*[timed_search(skill, q) for _ in range(runs)])
+        latency[q] = (n[0], mean(first) * 1000, mean(total) * 1000)
+        print(f"'{q}': {n[0]} results, first result {latency[q][1]:.1f} ms, "
+              f"total {latency[q][2]:.1f} ms")
+    return latency
+
+
+def bench_scoring(skill, fixtures):
+    titles = [e["renderer"]["title"]["runs"][0]["text"]
+              for f in fixtures.values() for e in f["results"]
+              if e["type"] == "VideoPreview"]
+    scorer = skill._get_scorer(next(iter(fixtures)))
+    runs = 200
+    start = time.perf_counter()
+    for _ in range(runs):
+        scorer.video_scores(titles)
+    elapsed = time.perf_counter() - start
+    rate = runs * len(titles) / elapsed
+    print(f"scoring: {rate:.0f} results/s")
+    return rate
+
+
+def bench_memory(skill, queries):
+    """ returns {query: peak KiB} """
+    peaks = {}
+    for q in queries:
+        tracemalloc.start()
+        for _ in skill.search_youtube(q, MediaType.VIDEO):
+            pass
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        peaks[q] = peak / 1024
+        print(f"'{q}': peak memory {peaks[q]:.1f} KiB per search")
+    return peaks
+
+
+def bench_channels(skill, search_class, queries):
+    channels = [r for q in queries for r in search_class(q).iterate_youtube()
+                if isinstance(r, ChannelPreview)]
+    if not channels:
+        return
+    start = time.perf_counter()
+    for ch in channels:
+        skill._expand_channel(ch)
+    elapsed = time.perf_counter() - start
+    print(f"channel expansion: {elapsed / len(channels) * 1000:.1f} ms "
+          f"per channel ({len(channels)} channels)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--page-latency", type=float, default=0.0)
+    parser.add_argument("--channel-latency", type=float, default=0.0)
+    parser.add_argument("--max-first-result-ms", type=float)
+    parser.add_argument("--max-total-ms", type=float)
+    parser.add_argument("--max-peak-kib", type=float)
+    parser.add_argument("--min-scoring-rate", type=float,
+                        help="results/s")
+    args = parser.parse_args()
+
+    data_dir = isolated_data_dir()  # removed at exit
+    module = load_skill_module()
+    skill = module.SimpleYoutubeSkill(bus=FakeBus(),
+                                      skill_id="benchmark.youtube")
+    skill.settings["cache_enabled"] = False
+    skill.settings["local_index"] = False
+    skill.settings["adaptive_depth"] = False
+    fixtures = load_fixtures()
+    queries = [f["query"] for f in fixtures.values()]
+
+    with replay_youtube(module, page_latency=args.page_latency,
+                        channel_latency=args.channel_latency) as search:
+        latency = bench_latency(skill, queries, args.runs)
+        bench_channels(skill, search, queries)
+    with replay_youtube(module):
+        peaks = bench_memory(skill, queries)
+    rate = bench_scoring(skill, fixtures)
+    skill.shutdown()
+
+    failures = []
+    for q, (n, first, total) in latency.items():
+        if not n:
+            failures.append(f"'{q}': no results")
+        if args.max_first_result_ms is not None and \
+                first > args.max_first_result_ms:
+            failures.append(f"'{q}': first result {first:.1f} ms > "
+                            f"{args.max_first_result_ms} ms")
+        if args.max_total_ms is not None and total > args.max_total_ms:
+            failures.append(f"'{q}': total {total:.1f} ms > "
+                            f"{args.max_total_ms} ms")
+    for q, peak in peaks.items():
+        if args.max_peak_kib is not None and peak > args.max_peak_kib:
+            failures.append(f"'{q}': peak memory {peak:.1f} KiB > "
+                            f"{args.max_peak_kib} KiB")
+    if args.min_scoring_rate is not None and rate < args.min_scoring_rate:
+        failures.append(f"scoring: {rate:.0f} results/s < "
+                        f"{args.min_scoring_rate} results/s")
+    if failures:
+        sys.exit("FAILED\n" + "\n".join(failures))
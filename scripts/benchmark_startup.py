@@ -0,0 +1,78 @@
+"""startup cost of SimpleYoutubeSkill
+
+every run happens in a fresh interpreter with only the ovos framework
+imported, reports the time to import the skill module, to construct the
+skill until it is ready and the deferred cost of loading tutubo paid by
+the warm up or the first search, exits non-zero when a --max-* threshold
+is not met
+
+    python scripts/benchmark_startup.py --runs 5 --max-import-ms 30
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from os.path import abspath, dirname
+from statistics import mean
+from tempfile import TemporaryDirectory
+
+from youtube_replay import isolated_env
+
+RUN = """
+import importlib.util, json, sys, time
+from ovos_utils.fakebus import FakeBus
+# already loaded in the skills service before any skill is
+import ovos_workshop.skills.common_play, ovos_bus_client.message
+start = time.perf_counter()
+# not youtube_replay.load_skill_module, it imports tutubo itself
+spec = importlib.util.spec_from_file_location(
+    "skill_ovos_youtube", {root!r} + "/__init__.py",
+    submodule_search_locations=[{root!r}])
+module = importlib.util.module_from_spec(spec)
+sys.modules[spec.name] = module
+spec.loader.exec_module(module)
+imported = time.perf_counter()
+skill = module.SimpleYoutubeSkill(bus=FakeBus(), skill_id="benchmark.youtube")
+ready = time.perf_counter()
+skill._load_tutubo()
+warm = time.perf_counter()
+skill.shutdown()
+print("RESULT", json.dumps({{"import": imported - start,
+                            "ready": ready - imported,
+                            "tutubo": warm - ready}}))
+"""
+
+
+def run_once(data_dir):
+    # not the real skill settings and data, see isolated_data_dir
+    env = dict(os.environ, **isolated_env(data_dir))
+    out = subprocess.run([sys.executable, "-c",
+                          RUN.format(root=dirname(dirname(abspath(__file__))))],
+                         capture_output=True, text=True, check=True,
+                         env=env).stdout
+    # ovos logs to stdout as well
+    line = [l for l in out.splitlines() if l.startswith("RESULT ")][-1]
+    return json.loads(line[len("RESULT "):])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-import-ms", type=float)
+    parser.add_argument("--max-ready-ms", type=float)
+    args = parser.parse_args()
+
+    with TemporaryDirectory(prefix="youtube-benchmark-") as data_dir:
+        runs = [run_once(data_dir) for _ in range(args.runs)]
+    failures = []
+    for key, label, limit in (("import", "module import", args.max_import_ms),
+                              ("ready", "construct to ready",
+                               args.max_ready_ms),
+                              ("tutubo", "deferred tutubo load", None)):
+        elapsed = mean(r[key] for r in runs) * 1000
+        print(f"{label}: {elapsed:.1f} ms")
+        if limit is not None and elapsed > limit:
+            failures.append(f"{label}: {elapsed:.1f} ms > {limit} ms")
+    if failures:
+        sys.exit("FAILED\n" + "\n".join(failures))
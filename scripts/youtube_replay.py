@@ -0,0 +1,180 @@
+"""offline record/replay of what tutubo returns to the skill
+
+record live searches into json fixtures:
+
+    python scripts/youtube_replay.py "zz top" "lofi hip hop"
+
+replay them with simulated latency:
+
+    with replay_youtube(skill_module, page_latency=0.3, channel_latency=0.8):
+        for r in skill.search_youtube("zz top", MediaType.VIDEO):
+            ...
+
+a fixture stores the raw renderer data of every search result, which is
+parsed by tutubo again on replay, plus a snapshot of each parsed channel
+"""
+import importlib.util
+import json
+import os
+import re
+import sys
+import time
+from contextlib import contextmanager
+from os import listdir, makedirs
+from tempfile import TemporaryDirectory
+from os.path import abspath, dirname, join
+from unittest.mock import patch
+
+from tutubo import models
+
+ROOT = dirname(dirname(abspath(__file__)))
+FIXTURES = join(dirname(abspath(__file__)), "fixtures")
+
+
+def load_skill_module():
+    """ import the skill package from this checkout as skill_ovos_youtube """
+    if "skill_ovos_youtube" in sys.modules:
+        return sys.modules["skill_ovos_youtube"]
+    spec = importlib.util.spec_from_file_location(
+        "skill_ovos_youtube", join(ROOT, "__init__.py"),
+        submodule_search_locations=[ROOT])
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def isolated_data_dir():
+    """ point XDG_DATA_HOME and XDG_CONFIG_HOME at a temporary directory,
+    so skills built afterwards do not read or write the real settings,
+    search cache, local index and depth history. removed when the
+    returned object is collected """
+    tmp = TemporaryDirectory(prefix="youtube-benchmark-")
+    os.environ.update(isolated_env(tmp.name))
+    return tmp
+
+
+def isolated_env(path):
+    """ XDG variables for skill data and settings under path """
+    return {"XDG_DATA_HOME": join(path, "data"),
+            "XDG_CONFIG_HOME": join(path, "config")}
+
+
+def normalize_query(query):
+    return " ".join(query.lower().split())
+
+
+def fixture_path(query, fixture_dir=FIXTURES):
+    slug = re.sub(r"[^\w]+", "_", normalize_query(query)).strip("_")
+    return join(fixture_dir, f"{slug}.json")
+
+
+# record
+def _channel_snapshot(ch, max_vids=8):
+    videos = []
+    for v in ch.videos:
+        videos.append({"watch_url": v.watch_url,
+                       "title": v.title,
+                       "thumbnail_url": v.thumbnail_url,
+                       "length": getattr(v, "length", 0) or 0})
+        if len(videos) >= max_vids:
+            break
+    return {"title": ch.title,
+            "thumbnail_url": ch.thumbnail_url,
+            "videos": videos}
+
+
+def record(query, fixture_dir=FIXTURES, max_res=50):
+    """ run a live search and save everything tutubo returned """
+    from tutubo import YoutubeSearch
+
+    results = []
+    for v in YoutubeSearch(query).iterate_youtube(max_res=max_res):
+        raw = getattr(v, "_raw_data", None)
+        if raw is None:
+            continue
+        entry = {"type": type(v).__name__, "renderer": raw}
+        if isinstance(v, models.ChannelPreview):
+            entry["channel"] = _channel_snapshot(v.get())
+        results.append(entry)
+
+    makedirs(fixture_dir, exist_ok=True)
+    path = fixture_path(query, fixture_dir)
+    with open(path, "w") as f:
+        json.dump({"query": query, "results": results}, f, indent=1)
+    return path
+
+
+# replay
+class ReplayVideo:
+    def __init__(self, data):
+        self.watch_url = data["watch_url"]
+        self.title = data["title"]
+        self.thumbnail_url = data["thumbnail_url"]
+        self.length = data.get("length", 0)
+
+
+class ReplayChannel:
+    def __init__(self, data):
+        self.title = data["title"]
+        self.thumbnail_url = data["thumbnail_url"]
+        self.videos = [ReplayVideo(v) for v in data["videos"]]
+
+
+class ReplayYoutubeSearch:
+    """ stand-in for tutubo.YoutubeSearch serving recorded fixtures """
+    fixtures = {}
+    page_size = 20  # results per simulated page fetch
+    page_latency = 0.0
+    channel_latency = 0.0
+
+    def __init__(self, query, *args, **kwargs):
+        self.query = query
+
+    def _channel_getter(self, data):
+        def get():
+            time.sleep(self.channel_latency)
+            return ReplayChannel(data)
+
+        return get
+
+    def iterate_youtube(self, max_res=-1, *args, **kwargs):
+        fixture = self.fixtures.get(normalize_query(self.query))
+        if fixture is None:
+            raise KeyError(f"no fixture recorded for '{self.query}'")
+        for idx, entry in enumerate(fixture["results"]):
+            if 0 < max_res <= idx:
+                break
+            if idx % self.page_size == 0:
+                time.sleep(self.page_latency)
+            r = getattr(models, entry["type"])(entry["renderer"])
+            if "channel" in entry:
+                r.get = self._channel_getter(entry["channel"])
+            yield r
+
+
+def load_fixtures(fixture_dir=FIXTURES):
+    fixtures = {}
+    for f in listdir(fixture_dir):
+        if f.endswith(".json"):
+            with open(join(fixture_dir, f)) as fi:
+                data = json.load(fi)
+            fixtures[normalize_query(data["query"])] = data
+    return fixtures
+
+
+@contextmanager
+def replay_youtube(skill_module, fixture_dir=FIXTURES, page_latency=0.0,
+                   channel_latency=0.0):
+    """ patch the skill module to search recorded fixtures """
+    search = type("YoutubeSearch", (ReplayYoutubeSearch,),
+                  {"fixtures": load_fixtures(fixture_dir),
+                   "page_latency": page_latency,
+                   "channel_latency": channel_latency})
+    with patch.object(skill_module, "YoutubeSearch", search):
+        yield search
+
+
+if __name__ == "__main__":
+    for q in sys.argv[1:]:
+        print(record(q))
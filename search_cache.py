@@ -0,0 +1,85 @@
+import json
+import sqlite3
+import time
+from contextlib import closing
+from threading import Lock
+from typing import List, Optional, Tuple
+
+from .results import result_to_dict, result_from_dict, in_stream_order
+
+
+class SearchCache:
+    """ sqlite backed TTL/LRU cache of raw youtube search results
+
+    only metadata is stored, scores are always recomputed by the skill
+    """
+
+    def __init__(self, path: str, ttl: float = 3600, max_entries: int = 500):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = Lock()
+        with self._connect() as db:
+            db.execute("CREATE TABLE IF NOT EXISTS searches ("
+                       "key TEXT PRIMARY KEY, "
+                       "results TEXT NOT NULL, "
+                       "created REAL NOT NULL, "
+                       "accessed REAL NOT NULL)")
+            db.execute("CREATE INDEX IF NOT EXISTS searches_accessed "
+                       "ON searches (accessed)")
+
+    def _connect(self):
+        return closing(sqlite3.connect(self.path, timeout=10))
+
+    @staticmethod
+    def make_key(phrase: str, media_type, explicit_request: bool,
+                 lazy_channels: bool = False, max_depth: int = 50,
+                 max_vids: int = 5) -> str:
+        """ results depend on the query and on how deep and how fully
+        channels were fetched """
+        phrase = " ".join(phrase.lower().split())
+        return f"{int(media_type)}|{int(explicit_request)}|" \
+               f"{int(lazy_channels)}|{max_depth}|{max_vids}|{phrase}"
+
+    def get(self, key: str) -> Optional[Tuple[List, bool]]:
+        """ return (results, is_stale) or None if key is not cached """
+        now = time.time()
+        with self._lock, self._connect() as db:
+            row = db.execute("SELECT results, created FROM searches "
+                             "WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            db.execute("UPDATE searches SET accessed = ? WHERE key = ?",
+                       (now, key))
+            db.commit()
+        results = [result_from_dict(r) for r in json.loads(row[0])]
+        return results, now - row[1] > self.ttl
+
+    def fresh(self, key: str) -> bool:
+        """ key is cached and not stale yet """
+        with self._lock, self._connect() as db:
+            row = db.execute("SELECT created FROM searches WHERE key = ?",
+                             (key,)).fetchone()
+        return row is not None and time.time() - row[0] <= self.ttl
+
+    def put(self, key: str, results: List):
+        """ store results in search order, not the order channels
+        finished parsing in """
+        now = time.time()
+        data = json.dumps([result_to_dict(r)
+                           for r in in_stream_order(results)])
+        with self._lock, self._connect() as db:
+            db.execute("INSERT OR REPLACE INTO searches "
+                       "(key, results, created, accessed) "
+                       "VALUES (?, ?, ?, ?)", (key, data, now, now))
+            # evict least recently used entries over the size cap
+            db.execute("DELETE FROM searches WHERE key NOT IN ("
+                       "SELECT key FROM searches "
+                       "ORDER BY accessed DESC LIMIT ?)",
+                       (self.max_entries,))
+            db.commit()
+
+    def clear(self):
+        with self._lock, self._connect() as db:
+            db.execute("DELETE FROM searches")
+            db.commit()
@@ -0,0 +1,300 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from threading import Condition, Event
+from typing import Callable, Iterator, List, Optional
+
+from ovos_utils.log import LOG
+
+from .http_session import install_session
+from .metrics import SearchMetrics, timed
+from .results import ChannelResult, video_from_tutubo, channel_from_tutubo, \
+    result_to_dict, result_from_dict
+
+
+def expand_channel(v, metrics: Optional[SearchMetrics] = None,
+                   max_vids: int = 5, rank: Optional[int] = None) \
+        -> ChannelResult:
+    """ parse a channel page into a ChannelResult """
+    start = time.perf_counter()
+    ch = v.get()  # parse channel page
+    result = channel_from_tutubo(ch, getattr(v, "channel_url", ""),
+                                 max_vids)._replace(rank=rank)
+    if metrics:
+        metrics.add_channel(time.perf_counter() - start)
+    return result
+
+
+def _channel_result(future):
+    try:
+        return future.result()
+    except Exception as e:
+        LOG.error(f"failed to parse youtube channel: {e}")
+
+
+def query_youtube(search, pool: ThreadPoolExecutor,
+                  channel_timeout: float = 4, lazy_channels: bool = False,
+                  max_res: int = 50, max_vids: int = 5,
+                  metrics: Optional[SearchMetrics] = None,
+                  drain: Optional[Callable[[], bool]] = None) -> Iterator:
+    """ iterate a tutubo YoutubeSearch and yield VideoResult/ChannelResult
+
+    channel pages are parsed in the thread pool while videos keep streaming,
+    channels not parsed before channel_timeout are dropped. channels keep
+    their rank in the search results, see ChannelResult.rank
+
+    once drain() is true no further results are fetched, only the channels
+    already being parsed are still yielded
+
+    runs in the skill process or inside a search worker process
+    """
+    from tutubo.models import Video, VideoPreview, Channel, ChannelPreview
+    deadline = time.monotonic() + channel_timeout
+    metrics = metrics or SearchMetrics()
+    pending = set()
+    rank = 0  # videos so far
+    try:
+        for v in timed(search.iterate_youtube(max_res=max_res),
+                       metrics, "fetch"):
+            if isinstance(v, Video) or isinstance(v, VideoPreview):
+                rank += 1
+                yield video_from_tutubo(v)
+            elif isinstance(v, ChannelPreview) and lazy_channels:
+                # channel page is only parsed if the user selects it
+                image = v.thumbnail_url
+                if image.startswith("//"):
+                    image = "https:" + image
+                yield ChannelResult(title=v.title, image=image,
+                                    url=v.channel_url, rank=rank)
+            elif isinstance(v, Channel) or isinstance(v, ChannelPreview):
+                pending.add(pool.submit(expand_channel, v, metrics,
+                                         max_vids, rank))
+            # yield channels as soon as they are ready
+            done = {f for f in pending if f.done()}
+            pending -= done
+            for f in done:
+                r = _channel_result(f)
+                if r:
+                    yield r
+            if drain and drain():
+                break
+
+        while pending:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                LOG.debug(f"youtube search deadline reached, "
+                          f"dropping {len(pending)} channels")
+                break
+            start = time.perf_counter()
+            done, pending = wait(pending, timeout=timeout,
+                                 return_when=FIRST_COMPLETED)
+            metrics.add("channel_wait", time.perf_counter() - start)
+            for f in done:
+                r = _channel_result(f)
+                if r:
+                    yield r
+    finally:
+        for f in pending:
+            f.cancel()
+
+
+def worker_main(conn, http_options: Optional[dict] = None):
+    """ search worker process loop
+
+    receives (phrase, options) and answers with ("result", dict) messages
+    followed by ("done", channel stats) or ("error", message).
+    "stop" aborts the current search, "drain" ends it once the channels
+    already being parsed are sent, None exits the process
+    """
+    from tutubo import YoutubeSearch
+    if http_options is not None:
+        install_session(**http_options)
+    pool = ThreadPoolExecutor(max_workers=3)
+    conn.send(("ready", None))
+    while True:
+        try:
+            msg = conn.recv()
+        except EOFError:  # skill process is gone
+            break
+        if msg is None:
+            break
+        if msg in ("stop", "drain"):  # search already finished
+            continue
+        phrase, options = msg
+        metrics = SearchMetrics(phrase)
+        draining = Event()
+        results = query_youtube(YoutubeSearch(phrase), pool,
+                                metrics=metrics, drain=draining.is_set,
+                                **options)
+        try:
+            for r in results:
+                conn.send(("result", result_to_dict(r)))
+                if conn.poll():
+                    if conn.recv() == "stop":  # the search was abandoned
+                        break
+                    draining.set()
+            results.close()
+            conn.send(("done", {"channel_fetches": metrics.channel_fetches,
+                                "channel_time": metrics.channel_time}))
+        except Exception as e:
+            conn.send(("error", str(e)))
+    pool.shutdown(wait=False)
+
+
+class SearchWorkerError(RuntimeError):
+    """ a search worker process died or stopped answering """
+
+
+class _Worker:
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+        self.tasks = 0
+
+
+class SearchWorkerPool:
+    """ runs youtube searches in separate processes
+
+    keeps tutubo page fetching and json parsing from competing for the GIL
+    with the rest of the skills service. at most `size` searches run in
+    workers at once, search() returns None when no worker becomes available
+    in time so the caller can search in process instead.
+    workers are replaced after max_tasks searches or when they misbehave
+    """
+
+    def __init__(self, size: int = 2, max_tasks: int = 100,
+                 start_method: str = "spawn",
+                 http_options: Optional[dict] = None):
+        self.size = size
+        self.max_tasks = max_tasks
+        self.http_options = http_options  # worker YoutubeSession settings
+        import multiprocessing  # only needed when workers are enabled
+        self._ctx = multiprocessing.get_context(start_method)
+        self._workers: List[_Worker] = []
+        self._idle: List[_Worker] = []
+        self._cond = Condition()
+        self._closed = False
+        with self._cond:
+            for _ in range(size):
+                self._spawn()
+
+    def _spawn(self):
+        parent, child = self._ctx.Pipe()
+        process = self._ctx.Process(target=worker_main,
+                                    args=(child, self.http_options),
+                                    name="ovos-youtube-search", daemon=True)
+        process.start()
+        child.close()
+        self._workers.append(_Worker(process, parent))
+
+    def _ready(self, worker: _Worker) -> bool:
+        """ a freshly spawned worker is ready once it finished importing """
+        if worker in self._idle:
+            return True
+        try:
+            if worker.conn.poll():
+                return worker.conn.recv()[0] == "ready"
+        except (EOFError, OSError):
+            self._retire(worker)
+        return False
+
+    def _retire(self, worker: _Worker):
+        if worker in self._workers:
+            self._workers.remove(worker)
+        try:
+            worker.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        worker.conn.close()
+        worker.process.join(0.1)
+        if worker.process.is_alive():
+            worker.process.terminate()
+        if not self._closed:
+            self._spawn()
+
+    def _acquire(self, timeout: float) -> Optional[_Worker]:
+        end = time.monotonic() + timeout
+        with self._cond:
+            while not self._closed:
+                for w in list(self._workers):
+                    if w not in self._idle and w.tasks == 0 and \
+                            self._ready(w):
+                        self._idle.append(w)
+                if self._idle:
+                    worker = self._idle.pop()
+                    worker.tasks += 1
+                    return worker
+                remaining = end - time.monotonic()
+                if remaining <= 0:
+                    return None
+                # wait for a busy worker, or poll workers still starting
+                self._cond.wait(min(remaining, 0.05))
+        return None
+
+    def _release(self, worker: _Worker, healthy: bool):
+        with self._cond:
+            if not healthy or worker.tasks >= self.max_tasks:
+                self._retire(worker)
+            elif worker in self._workers:
+                self._idle.append(worker)
+            self._cond.notify()
+
+    def search(self, phrase: str, options: dict,
+               metrics: Optional[SearchMetrics] = None,
+               timeout: float = 0.5,
+               drain: Optional[Callable[[], bool]] = None) \
+            -> Optional[Iterator]:
+        """ results iterator from a worker, None if all workers are busy
+        for longer than timeout, see query_youtube for drain """
+        worker = self._acquire(timeout)
+        if worker is None:
+            return None
+        return self._stream(worker, phrase, options, metrics, drain)
+
+    def _stream(self, worker: _Worker, phrase: str, options: dict,
+                metrics: Optional[SearchMetrics],
+                drain: Optional[Callable[[], bool]] = None):
+        finished = False
+        draining = False
+        try:
+            worker.conn.send((phrase, options))
+            while True:
+                kind, data = worker.conn.recv()
+                if kind == "result":
+                    yield result_from_dict(data)
+                    if drain and not draining and drain():
+                        worker.conn.send("drain")
+                        draining = True
+                    continue
+                finished = True
+                if kind == "error":
+                    LOG.error(f"youtube search worker failed: {data}")
+                elif metrics:
+                    metrics.channel_fetches += data["channel_fetches"]
+                    metrics.channel_time += data["channel_time"]
+                return
+        except (EOFError, OSError) as e:
+            raise SearchWorkerError(f"youtube search worker died: {e}")
+        finally:
+            healthy = finished or self._stop(worker)
+            self._release(worker, healthy)
+
+    @staticmethod
+    def _stop(worker: _Worker, timeout: float = 2) -> bool:
+        """ abort the search of an abandoned worker, False if it does not
+        finish in time and needs to be replaced """
+        try:
+            worker.conn.send("stop")
+            while worker.conn.poll(timeout):
+                if worker.conn.recv()[0] in ("done", "error"):
+                    return True
+        except (EOFError, OSError):
+            pass
+        return False
+
+    def shutdown(self):
+        with self._cond:
+            self._closed = True
+            for w in list(self._workers):
+                self._retire(w)
+            self._idle.clear()
+            self._cond.notify_all()
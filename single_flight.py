@@ -0,0 +1,106 @@
+from threading import Condition, Lock
+from typing import Callable, Dict, Iterator, Tuple
+
+
+class _Flight:
+    """ one upstream iterator, buffered so several readers can share it """
+
+    def __init__(self, iterator: Iterator):
+        self.iterator = iterator
+        self.results = []
+        self.done = False
+        self.error = None
+        self.pulling = False  # a reader is currently advancing the iterator
+        self.readers = 0
+        self.cond = Condition()
+
+
+class SingleFlight:
+    """ coalesces identical concurrent requests into a single upstream call
+
+    the first caller for a key starts the upstream iterator, callers joining
+    while it is in flight read the same results from a shared buffer.
+    whichever reader needs the next item advances the upstream iterator, so
+    the fetch keeps going if the caller that started it stops early, it is
+    only closed once every reader is gone
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, _Flight] = {}
+        self._lock = Lock()
+
+    def join(self, key: str, factory: Callable[[], Iterator]) \
+            -> Tuple[Iterator, bool]:
+        """ returns (results, shared), shared is True if an in flight
+        upstream call was reused instead of calling factory """
+        with self._lock:
+            flight = self._flights.get(key)
+            shared = flight is not None
+            if not shared:
+                flight = self._flights[key] = _Flight(iter(factory()))
+            flight.readers += 1
+        return self._read(key, flight), shared
+
+    def readers(self, key: str) -> int:
+        """ callers currently reading the in flight results of key """
+        with self._lock:
+            flight = self._flights.get(key)
+            return flight.readers if flight else 0
+
+    def _read(self, key: str, flight: _Flight):
+        idx = 0
+        try:
+            while True:
+                with flight.cond:
+                    while idx >= len(flight.results) and not flight.done \
+                            and flight.pulling:
+                        flight.cond.wait()
+                    if idx < len(flight.results):
+                        item = flight.results[idx]
+                    elif flight.done:
+                        if flight.error:
+                            raise flight.error
+                        return
+                    else:
+                        # nobody is fetching the next item, do it ourselves
+                        flight.pulling = True
+                        item = None
+                if item is None:
+                    self._pull(flight)
+                    continue
+                idx += 1
+                yield item
+        finally:
+            self._leave(key, flight)
+
+    @staticmethod
+    def _pull(flight: _Flight):
+        """ advance the upstream iterator into the shared buffer """
+        item = None
+        try:
+            item = next(flight.iterator)
+        except StopIteration:
+            with flight.cond:
+                flight.done = True
+        except Exception as e:
+            with flight.cond:
+                flight.done = True
+                flight.error = e
+        with flight.cond:
+            if item is not None:
+                flight.results.append(item)
+            flight.pulling = False
+            flight.cond.notify_all()
+
+    def _leave(self, key: str, flight: _Flight):
+        with self._lock:
+            flight.readers -= 1
+            if flight.readers:
+                return
+            if self._flights.get(key) is flight:
+                self._flights.pop(key)
+        if not flight.done:
+            # last reader gone before the upstream finished
+            close = getattr(flight.iterator, "close", None)
+            if close:
+                close()
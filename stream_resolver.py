@@ -0,0 +1,127 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, \
+    TimeoutError as FutureTimeout
+from threading import Lock
+from typing import Dict, Iterable, Optional
+from urllib.parse import urlparse, parse_qs
+
+from ovos_utils.log import LOG
+
+
+class StreamExtractor:
+    """ turns a youtube watch url into playable stream metadata
+
+    subclasses return a dict with at least "uri", optionally "expires"
+    as a unix timestamp, or None if the url can not be resolved
+    """
+
+    def extract(self, uri: str) -> Optional[dict]:
+        raise NotImplementedError
+
+
+class OCPStreamExtractor(StreamExtractor):
+    """ uses the OCP stream extractor plugins, same as OCP at playback """
+
+    def __init__(self, video: bool = True):
+        self.video = video
+        self._handler = None
+
+    def extract(self, uri: str) -> Optional[dict]:
+        if self._handler is None:
+            from ovos_plugin_manager.ocp import load_stream_extractors
+            self._handler = load_stream_extractors()
+        meta = self._handler.extract_stream(f"youtube//{uri}",
+                                            video=self.video)
+        return meta if meta.get("uri") else None
+
+
+class StubExtractor(StreamExtractor):
+    """ offline extractor, "resolves" every url to itself """
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+
+    def extract(self, uri: str) -> Optional[dict]:
+        time.sleep(self.delay)
+        return {"uri": uri}
+
+
+def stream_expiration(meta: dict, default_ttl: float) -> float:
+    """ youtube stream urls carry their expiration in the expire param """
+    if meta.get("expires"):
+        return float(meta["expires"])
+    expire = parse_qs(urlparse(meta["uri"]).query).get("expire")
+    if expire and expire[0].isdigit():
+        return float(expire[0])
+    return time.time() + default_ttl
+
+
+class StreamResolver:
+    """ resolves stream urls in a background thread pool and caches
+    them until they expire """
+
+    def __init__(self, extractor: StreamExtractor, workers: int = 2,
+                 ttl: float = 3600, margin: float = 300,
+                 max_entries: int = 100):
+        self.extractor = extractor
+        self.ttl = ttl
+        self.margin = margin  # do not serve urls about to expire
+        self.max_entries = max_entries
+        self._streams: Dict[str, tuple] = {}  # uri -> (expires, meta)
+        self._pending = {}  # uri -> Future
+        self._lock = Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers)
+
+    def get(self, uri: str) -> Optional[dict]:
+        """ resolved stream metadata for uri, if cached and still valid """
+        with self._lock:
+            cached = self._streams.get(uri)
+            if not cached:
+                return None
+            if cached[0] - self.margin < time.time():
+                self._streams.pop(uri)
+                return None
+            return cached[1]
+
+    def prefetch(self, uris: Iterable[str]):
+        """ start resolving uris in the background """
+        for uri in uris:
+            with self._lock:
+                if uri in self._pending or uri in self._streams:
+                    continue
+                self._pending[uri] = self._pool.submit(self._resolve, uri)
+
+    def resolve(self, uri: str, timeout: float = 5) -> Optional[dict]:
+        """ stream metadata for uri, waits up to timeout for a resolution
+        already in progress instead of starting another one """
+        stream = self.get(uri)
+        if stream:
+            return stream
+        self.prefetch([uri])
+        with self._lock:
+            future = self._pending.get(uri)
+        if future:
+            try:
+                future.result(timeout=timeout)
+            except FutureTimeout:
+                return None
+        return self.get(uri)
+
+    def _resolve(self, uri: str):
+        try:
+            meta = self.extractor.extract(uri)
+            if meta:
+                expires = stream_expiration(meta, self.ttl)
+                with self._lock:
+                    self._streams[uri] = (expires, meta)
+                    while len(self._streams) > self.max_entries:
+                        # drop the oldest entry
+                        self._streams.pop(next(iter(self._streams)))
+        except Exception as e:
+            LOG.error(f"failed to resolve youtube stream {uri}: {e}")
+        finally:
+            with self._lock:
+                self._pending.pop(uri, None)
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False)
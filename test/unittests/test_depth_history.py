@@ -0,0 +1,66 @@
+import unittest
+from os.path import join
+from tempfile import TemporaryDirectory
+
+from skill_ovos_youtube.depth_history import DepthHistory, learned_depth, \
+    SELECTED, SETTLED
+
+
+class TestDepthHistory(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.history = DepthHistory(join(self.tmp.name, "depth.db"),
+                                    max_entries=10, samples=3)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_values_per_pattern_and_kind(self):
+        self.history.add("a", SELECTED, 1)
+        self.history.add("a", SELECTED, 2)
+        self.history.add("a", SETTLED, 7)
+        self.history.add("b", SELECTED, 9)
+        self.assertEqual(self.history.values("a", SELECTED), [2, 1])
+        self.assertEqual(self.history.values("a", SETTLED), [7])
+        self.assertEqual(self.history.values("b", SELECTED), [9])
+        self.assertEqual(self.history.values("c", SELECTED), [])
+
+    def test_samples_per_pattern(self):
+        for i in range(5):
+            self.history.add("a", SELECTED, i)
+        self.assertEqual(self.history.values("a", SELECTED), [4, 3, 2])
+
+    def test_max_entries(self):
+        for i in range(10):
+            self.history.add(f"p{i}", SELECTED, i)
+        self.history.add("new", SELECTED, 0)
+        self.assertEqual(self.history.values("p0", SELECTED), [])
+        self.assertEqual(self.history.values("p1", SELECTED), [1])
+        self.assertEqual(self.history.values("new", SELECTED), [0])
+
+    def test_clear(self):
+        self.history.add("a", SELECTED, 1)
+        self.history.clear()
+        self.assertEqual(self.history.values("a", SELECTED), [])
+
+
+class TestLearnedDepth(unittest.TestCase):
+    def test_not_enough_samples(self):
+        self.assertIsNone(learned_depth([1, 2], cap=50))
+
+    def test_p90_plus_margin(self):
+        values = list(range(10))  # p90 is 9
+        self.assertEqual(learned_depth(values, cap=50), 12)
+        self.assertEqual(learned_depth(values, cap=50, margin=0), 10)
+
+    def test_outliers_ignored(self):
+        values = [0] * 19 + [40]
+        self.assertEqual(learned_depth(values, cap=50), 3)
+
+    def test_bounds(self):
+        self.assertEqual(learned_depth([40] * 3, cap=20), 20)
+        self.assertEqual(learned_depth([0] * 3, cap=50, floor=5), 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
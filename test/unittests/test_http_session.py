@@ -0,0 +1,209 @@
+import unittest
+from unittest.mock import patch
+
+import requests
+from tutubo import _innertube, channel
+
+from skill_ovos_youtube import http_session
+from skill_ovos_youtube.http_session import TokenBucket, YoutubeSession, \
+    install_session
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+class TestTokenBucket(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = patch.object(http_session, "time", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_burst_does_not_wait(self):
+        bucket = TokenBucket(rate=2, burst=3)
+        self.assertEqual([bucket.acquire() for _ in range(3)], [0, 0, 0])
+        self.assertEqual(self.clock.slept, [])
+
+    def test_waits_for_tokens_after_burst(self):
+        bucket = TokenBucket(rate=2, burst=1)
+        self.assertEqual(bucket.acquire(), 0)
+        self.assertAlmostEqual(bucket.acquire(), 0.5)
+        self.assertAlmostEqual(bucket.acquire(), 0.5)
+        self.assertAlmostEqual(sum(self.clock.slept), 1.0)
+
+    def test_waiting_callers_queue_up(self):
+        bucket = TokenBucket(rate=2, burst=1)
+        bucket.acquire()
+        # three callers arriving at once wait 0.5, 1 and 1.5 seconds
+        with patch.object(self.clock, "sleep"):
+            waits = [bucket.acquire() for _ in range(3)]
+        self.assertEqual(waits, [0.5, 1.0, 1.5])
+
+    def test_refills_up_to_burst(self):
+        bucket = TokenBucket(rate=2, burst=2)
+        bucket.acquire()
+        bucket.acquire()
+        self.clock.now += 60  # idle, refills to burst only
+        self.assertEqual([bucket.acquire() for _ in range(2)], [0, 0])
+        self.assertAlmostEqual(bucket.acquire(), 0.5)
+
+    def test_unlimited(self):
+        bucket = TokenBucket(rate=0, burst=1)
+        self.assertEqual([bucket.acquire() for _ in range(100)], [0] * 100)
+        self.assertEqual(self.clock.slept, [])
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, headers=None, data=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.data = data
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(response=self)
+
+    def json(self):
+        return self.data
+
+
+class FakeUpstream:
+    """ replaces requests.Session.request, answers with the given
+    responses in order, exceptions are raised """
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def __call__(self, method, url, **kwargs):
+        self.calls.append((method, url, kwargs))
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+class TestYoutubeSession(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = patch.object(http_session, "time", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.session = YoutubeSession(rate=0, retries=2, backoff=0.5,
+                                      max_backoff=8)
+        self.addCleanup(self.session.close)
+
+    def upstream(self, *responses):
+        upstream = FakeUpstream(*responses)
+        self.session.session.request = upstream
+        return upstream
+
+    def test_retries_server_errors(self):
+        upstream = self.upstream(FakeResponse(503), FakeResponse(500),
+                                 FakeResponse(200))
+        response = self.session.get("https://www.youtube.com")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(upstream.calls), 3)
+        self.assertEqual(self.session.stats["retries"], 2)
+        # jittered exponential backoff
+        self.assertEqual(len(self.clock.slept), 2)
+        self.assertLessEqual(self.clock.slept[0], 0.5)
+        self.assertLessEqual(self.clock.slept[1], 1.0)
+
+    def test_honors_retry_after(self):
+        self.upstream(FakeResponse(429, {"Retry-After": "3"}),
+                      FakeResponse(200))
+        self.session.get("https://www.youtube.com")
+        self.assertEqual(self.clock.slept, [3.0])
+
+    def test_retry_after_capped(self):
+        self.upstream(FakeResponse(429, {"Retry-After": "3600"}),
+                      FakeResponse(200))
+        self.session.get("https://www.youtube.com")
+        self.assertEqual(self.clock.slept, [8.0])
+
+    def test_gives_up_after_retries(self):
+        upstream = self.upstream(*[FakeResponse(500) for _ in range(3)])
+        response = self.session.post("https://www.youtube.com")
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(len(upstream.calls), 3)
+        self.assertEqual(upstream.calls[0][0], "POST")
+
+    def test_client_errors_not_retried(self):
+        upstream = self.upstream(FakeResponse(404))
+        self.assertEqual(self.session.get("https://www.youtube.com")
+                         .status_code, 404)
+        self.assertEqual(len(upstream.calls), 1)
+        self.assertEqual(self.clock.slept, [])
+
+    def test_rate_limited(self):
+        self.session.bucket = TokenBucket(rate=2, burst=1)
+        self.upstream(FakeResponse(200), FakeResponse(200))
+        self.session.get("https://www.youtube.com")
+        self.session.get("https://www.youtube.com")
+        self.assertEqual(self.session.stats["throttled"], 1)
+        self.assertAlmostEqual(sum(self.clock.slept), 0.5)
+
+
+class TestInstallSession(unittest.TestCase):
+    def setUp(self):
+        # install_session patches tutubo for the whole process, undone here
+        for patcher in (patch.object(http_session, "_session", None),
+                        patch.object(_innertube, "_post", _innertube._post),
+                        patch.object(channel, "requests", channel.requests)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_patches_tutubo_once(self):
+        session = install_session(rate=0)
+        self.addCleanup(session.close)
+        self.assertIsInstance(session, YoutubeSession)
+        self.assertIs(install_session(rate=0), session)
+        self.assertIsNot(channel.requests, requests)
+        session.session.request = FakeUpstream(FakeResponse(200))
+        channel.requests.get("https://www.youtube.com/@zztop")
+        self.assertEqual(session.stats["requests"], 1)
+        # anything but get and post is still the requests module
+        self.assertIs(channel.requests.HTTPError, requests.HTTPError)
+
+    def test_search_requests(self):
+        session = install_session(rate=0)
+        self.addCleanup(session.close)
+        upstream = session.session.request = FakeUpstream(
+            FakeResponse(200, data={"contents": []}))
+        self.assertEqual(_innertube._post("search", {}, {"query": "zz top"}),
+                         {"contents": []})
+        method, url, kwargs = upstream.calls[0]
+        self.assertEqual((method, url), ("POST",
+                                         f"{_innertube._BASE_URL}/search"))
+        self.assertEqual(kwargs["json"], {"query": "zz top"})
+
+    def test_search_errors(self):
+        # the same errors tutubo raises itself
+        session = install_session(rate=0, retries=0)
+        self.addCleanup(session.close)
+        session.session.request = FakeUpstream(
+            requests.ConnectionError("offline"), FakeResponse(403))
+        with self.assertRaisesRegex(RuntimeError, "Network error"):
+            _innertube._post("search", {}, {"query": "zz top"})
+        with self.assertRaisesRegex(RuntimeError, "HTTP 403"):
+            _innertube._post("search", {}, {"query": "zz top"})
+
+    def test_unsupported_tutubo(self):
+        channel.requests = object()
+        self.assertIsNone(install_session())
+        self.assertIsNone(http_session._session)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+import json
+import re
+import unittest
+from os.path import abspath, dirname, join
+from unittest.mock import patch
+
+from ovos_utils.parse import fuzzy_match, MatchStrategy
+from ovos_utils.text_utils import remove_accents_and_punct as ovos_normalize
+from tutubo.models import VideoPreview
+
+from skill_ovos_youtube import scoring
+from skill_ovos_youtube.scoring import SearchScorer, compile_voc_matcher, \
+    remove_accents_and_punct
+
+FIXTURE = join(dirname(dirname(dirname(abspath(__file__)))),
+               "scripts", "fixtures", "zz_top.json")
+
+OFFICIAL = ["official", "Offizieller Beamter", "funcionário", "ufficiale"]
+
+TITLES = ["ZZ Top - La Grange (Official Audio)",
+          "[OFFICIAL] la grange!!",
+          "zz top unofficial bootleg",
+          "ZZ Top - Gimme All Your Lovin' (Official Music Video)",
+          "Canción oficial del funcionário",
+          "officials",
+          "la grange",
+          ""]
+
+
+def fixture_titles():
+    with open(FIXTURE) as f:
+        results = json.load(f)["results"]
+    return [VideoPreview(r["renderer"]).title for r in results
+            if r["type"] == "VideoPreview"]
+
+
+def voc_match(utt, vocs):
+    # OVOSSkill.voc_match, used by the skill before SearchScorer
+    utt = ovos_normalize(utt)
+    vocs = [ovos_normalize(v) for v in vocs]
+    return any([re.match(r'.*\b' + re.escape(i) + r'\b.*', utt, re.IGNORECASE)
+                for i in vocs])
+
+
+def old_channel_score(phrase, title, idx=0, explicit_request=False,
+                      base_score=0, fallback_mode=False):
+    # calc_channel_score before SearchScorer
+    score = base_score - idx
+    score += 100 * fuzzy_match(phrase.lower(), title.lower(),
+                               strategy=MatchStrategy.TOKEN_SET_RATIO)
+    if fallback_mode:
+        if not explicit_request:
+            score -= 25
+    return min(100, score)
+
+
+def old_video_score(phrase, title, idx=0, explicit_request=False,
+                    base_score=0, fallback_mode=False):
+    # calc_score before SearchScorer
+    score = old_channel_score(phrase, title, idx, explicit_request,
+                              base_score, fallback_mode)
+    if voc_match(title, OFFICIAL):
+        score += 5
+    return min(100, score)
+
+
+class TestSearchScorer(unittest.TestCase):
+    """ scores are identical to the per title formula they replaced """
+
+    def setUp(self):
+        self.titles = fixture_titles() + TITLES
+
+    def check_scores(self, phrase, **kwargs):
+        fallback_mode = kwargs.pop("fallback_mode", False)
+        scorer = SearchScorer(phrase, compile_voc_matcher(OFFICIAL),
+                              fallback_mode=fallback_mode)
+        expected = [old_video_score(phrase, t, idx,
+                                    fallback_mode=fallback_mode, **kwargs)
+                    for idx, t in enumerate(self.titles)]
+        self.assertEqual(scorer.video_scores(self.titles, **kwargs), expected)
+        for idx, t in enumerate(self.titles):
+            self.assertEqual(scorer.video_score(t, idx, **kwargs),
+                             expected[idx])
+            self.assertEqual(scorer.channel_score(t, idx, **kwargs),
+                             old_channel_score(phrase, t, idx,
+                                               fallback_mode=fallback_mode,
+                                               **kwargs))
+
+    def test_scores(self):
+        for phrase in ("zz top", "ZZ Top La Grange", "música oficial", ""):
+            self.check_scores(phrase)
+            self.check_scores(phrase, base_score=30)
+            self.check_scores(phrase, fallback_mode=True)
+            self.check_scores(phrase, fallback_mode=True,
+                              explicit_request=True)
+
+    def test_scores_without_rapidfuzz(self):
+        with patch.object(scoring, "process", None):
+            self.check_scores("zz top")
+
+    def test_positions(self):
+        scorer = SearchScorer("zz top", compile_voc_matcher(OFFICIAL))
+        titles, positions = self.titles[:5], [3, 0, 7, 1, 2]
+        self.assertEqual(scorer.video_scores(titles, positions=positions),
+                         [old_video_score("zz top", t, idx)
+                          for idx, t in zip(positions, titles)])
+
+    def test_voc_matcher(self):
+        matcher = compile_voc_matcher(OFFICIAL)
+        scorer = SearchScorer("zz top", matcher)
+        for t in self.titles:
+            self.assertEqual(scorer.is_official(t), voc_match(t, OFFICIAL), t)
+        self.assertIsNone(compile_voc_matcher([]))
+        self.assertFalse(SearchScorer("zz top").is_official("official"))
+
+    def test_remove_accents_and_punct(self):
+        for t in self.titles + ["Ça c'est {très} «drôle»!"]:
+            self.assertEqual(remove_accents_and_punct(t), ovos_normalize(t))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import time
+import unittest
+from os.path import join
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from ovos_utils.ocp import MediaType
+
+from skill_ovos_youtube.results import VideoResult, ChannelResult
+from skill_ovos_youtube.search_cache import SearchCache
+
+
+def video(i):
+    return VideoResult(uri=f"https://www.youtube.com/watch?v={i}",
+                       title=f"video {i}", length=60, image=f"{i}.jpg",
+                       channel="channel")
+
+
+CHANNEL = ChannelResult(title="channel", image="ch.jpg", url="https://ch",
+                        videos=(video("c0"), video("c2")), positions=(0, 2),
+                        rank=1)
+
+
+class TestSearchCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.cache = SearchCache(join(self.tmp.name, "cache.db"), ttl=60,
+                                 max_entries=2)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_make_key(self):
+        key = SearchCache.make_key("  ZZ   Top ", MediaType.VIDEO, False)
+        self.assertEqual(key, SearchCache.make_key("zz top", MediaType.VIDEO,
+                                                   False))
+        self.assertNotEqual(key, SearchCache.make_key("zz top",
+                                                      MediaType.MUSIC, False))
+        self.assertNotEqual(key, SearchCache.make_key("zz top",
+                                                      MediaType.VIDEO, True))
+
+    def test_make_key_fetch_options(self):
+        # results fetched with other channel or depth settings differ
+        key = SearchCache.make_key("zz top", MediaType.VIDEO, False)
+        for options in ({"lazy_channels": True}, {"max_depth": 20},
+                        {"max_vids": 3}):
+            self.assertNotEqual(key, SearchCache.make_key(
+                "zz top", MediaType.VIDEO, False, **options))
+
+    def test_round_trip(self):
+        self.assertIsNone(self.cache.get("q"))
+        results = [video(0), CHANNEL, video(1)]
+        self.cache.put("q", results)
+        cached, stale = self.cache.get("q")
+        self.assertFalse(stale)
+        self.assertEqual(cached, results)
+
+    def test_channels_stored_at_their_rank(self):
+        # the channel finished parsing after video 2 arrived
+        self.cache.put("q", [video(0), video(1), video(2), CHANNEL])
+        cached, _ = self.cache.get("q")
+        self.assertEqual(cached, [video(0), CHANNEL, video(1), video(2)])
+
+    def test_stale_after_ttl(self):
+        self.cache.put("q", [video(0)])
+        with patch("time.time", return_value=time.time() + 61):
+            cached, stale = self.cache.get("q")
+        self.assertTrue(stale)
+        self.assertEqual(cached, [video(0)])
+
+    def test_fresh(self):
+        self.assertFalse(self.cache.fresh("q"))
+        self.cache.put("q", [video(0)])
+        self.assertTrue(self.cache.fresh("q"))
+        with patch("time.time", return_value=time.time() + 61):
+            self.assertFalse(self.cache.fresh("q"))
+
+    def test_least_recently_used_evicted(self):
+        now = time.time()
+        with patch("time.time", return_value=now):
+            self.cache.put("a", [video(0)])
+        with patch("time.time", return_value=now + 1):
+            self.cache.put("b", [video(1)])
+        with patch("time.time", return_value=now + 2):
+            self.cache.get("a")  # b is now the least recently used
+        with patch("time.time", return_value=now + 3):
+            self.cache.put("c", [video(2)])
+        self.assertIsNotNone(self.cache.get("a"))
+        self.assertIsNone(self.cache.get("b"))
+        self.assertIsNotNone(self.cache.get("c"))
+
+    def test_clear(self):
+        self.cache.put("q", [video(0)])
+        self.cache.clear()
+        self.assertIsNone(self.cache.get("q"))
+
+
+if __name__ == "__main__":
+    unittest.main()
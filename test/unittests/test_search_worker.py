@@ -0,0 +1,184 @@
+import multiprocessing
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from tutubo.models import VideoPreview, ChannelPreview
+
+from skill_ovos_youtube.results import VideoResult, ChannelResult
+from skill_ovos_youtube.search_worker import query_youtube, SearchWorkerPool
+
+
+class FakeVideo:
+    def __init__(self, i, title):
+        self.watch_url = f"https://www.youtube.com/watch?v={i}"
+        self.title = title
+        self.thumbnail_url = f"https://i.ytimg.com/vi/{i}/hq.jpg"
+
+
+class FakeChannel:
+    def __init__(self, title):
+        self.title = title
+        self.thumbnail_url = "https://yt3.ggpht.com/ch.jpg"
+        self.videos = [FakeVideo("c0", f"{title} song 0"),
+                       FakeVideo("c1", "support us on patreon"),
+                       FakeVideo("c2", f"{title} song 2")]
+
+
+def video_preview(i, title):
+    return VideoPreview({"videoId": str(i),
+                         "title": {"runs": [{"text": title}]},
+                         "lengthText": {"simpleText": "3:00"},
+                         "thumbnail": {"thumbnails": [
+                             {"url": f"https://i.ytimg.com/vi/{i}/hq.jpg"}]}})
+
+
+def channel_preview(title, delay=0.0, error=None):
+    preview = ChannelPreview({"channelId": "UC123",
+                              "title": {"simpleText": title},
+                              "thumbnail": {"thumbnails": [
+                                  {"url": "//yt3.ggpht.com/ch.jpg"}]}})
+
+    def get():
+        time.sleep(delay)
+        if error:
+            raise error
+        return FakeChannel(title)
+
+    preview.get = get
+    return preview
+
+
+class FakeSearch:
+    """ tutubo YoutubeSearch returning a channel at rank 1 """
+    channel_delay = 0.0
+    page_delay = 0.0
+
+    def __init__(self, query, *args, **kwargs):
+        self.query = query
+        self.fetched = 0
+
+    def iterate_youtube(self, max_res=50):
+        items = [video_preview(0, f"{self.query} 0"),
+                 channel_preview(self.query, self.channel_delay)]
+        items += [video_preview(i, f"{self.query} {i}") for i in range(1, 10)]
+        for item in items[:max_res]:
+            time.sleep(self.page_delay)
+            self.fetched += 1
+            yield item
+
+
+class TestQueryYoutube(unittest.TestCase):
+    def setUp(self):
+        self.pool = ThreadPoolExecutor(max_workers=2)
+
+    def tearDown(self):
+        self.pool.shutdown()
+
+    def test_videos_and_channels(self):
+        results = list(query_youtube(FakeSearch("abba"), self.pool))
+        videos = [r for r in results if isinstance(r, VideoResult)]
+        channels = [r for r in results if isinstance(r, ChannelResult)]
+        self.assertEqual(len(videos), 10)
+        self.assertEqual(videos[0].uri, "https://www.youtube.com/watch?v=0")
+        self.assertEqual(len(channels), 1)
+        channel = channels[0]
+        self.assertEqual(channel.title, "abba")
+        # patreon videos are skipped, positions keep the original index
+        self.assertEqual([v.title for v in channel.videos],
+                         ["abba song 0", "abba song 2"])
+        self.assertEqual(channel.positions, (0, 2))
+        self.assertEqual([v.channel for v in channel.videos],
+                         ["abba", "abba"])
+
+    def test_late_channel_keeps_rank(self):
+        search = FakeSearch("abba")
+        search.channel_delay = 0.2
+        results = list(query_youtube(search, self.pool))
+        # parsed after every video arrived, ranked after the first one
+        self.assertIsInstance(results[-1], ChannelResult)
+        self.assertEqual(results[-1].rank, 1)
+
+    def test_lazy_channels(self):
+        results = list(query_youtube(FakeSearch("abba"), self.pool,
+                                     lazy_channels=True))
+        channel = results[1]
+        self.assertIsInstance(channel, ChannelResult)
+        self.assertEqual(channel.videos, ())
+        self.assertEqual(channel.rank, 1)
+        self.assertEqual(channel.image, "https://yt3.ggpht.com/ch.jpg")
+
+    def test_channel_timeout(self):
+        search = FakeSearch("abba")
+        search.channel_delay = 1
+        start = time.monotonic()
+        results = list(query_youtube(search, self.pool, channel_timeout=0.1))
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertFalse(any(isinstance(r, ChannelResult) for r in results))
+
+    def test_channel_errors_are_dropped(self):
+        search = FakeSearch("abba")
+        with patch.object(search, "iterate_youtube", return_value=iter([
+                channel_preview("abba", error=ConnectionError("down")),
+                video_preview(0, "abba 0")])):
+            results = list(query_youtube(search, self.pool))
+        self.assertEqual([r.title for r in results], ["abba 0"])
+
+    def test_drain(self):
+        search = FakeSearch("abba")
+        search.channel_delay = 0.2
+        seen = []
+        results = []
+        for r in query_youtube(search, self.pool,
+                               drain=lambda: len(seen) >= 3):
+            seen.append(r)
+            results.append(r)
+        # no results are fetched after draining, the pending channel
+        # is still waited for
+        self.assertEqual(search.fetched, 4)
+        self.assertIsInstance(results[-1], ChannelResult)
+        self.assertEqual(len(results), 4)
+
+    def test_max_res(self):
+        search = FakeSearch("abba")
+        results = list(query_youtube(search, self.pool, max_res=1))
+        self.assertEqual(len(results), 1)
+        self.assertEqual(search.fetched, 1)
+
+
+@unittest.skipUnless("fork" in multiprocessing.get_all_start_methods(),
+                     "workers inherit the patched tutubo through fork")
+class TestSearchWorkerPool(unittest.TestCase):
+    def setUp(self):
+        patcher = patch("tutubo.YoutubeSearch", FakeSearch)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.workers = SearchWorkerPool(1, max_tasks=2, start_method="fork")
+        self.addCleanup(self.workers.shutdown)
+
+    def test_search(self):
+        results = self.workers.search("abba", {}, timeout=5)
+        results = list(results)
+        self.assertEqual(len(results), 11)
+        self.assertEqual(results[0].title, "abba 0")
+        channel = [r for r in results if isinstance(r, ChannelResult)][0]
+        self.assertEqual(channel.rank, 1)
+        self.assertEqual(channel.positions, (0, 2))
+
+    def test_busy(self):
+        first = self.workers.search("abba", {}, timeout=5)
+        next(first)
+        self.assertIsNone(self.workers.search("abba", {}, timeout=0.1))
+        first.close()  # abandoned search, the worker is reused
+        self.assertIsNotNone(self.workers.search("abba", {}, timeout=5))
+
+    def test_worker_recycled(self):
+        for _ in range(3):
+            self.assertEqual(len(list(self.workers.search("abba", {},
+                                                          timeout=5))), 11)
+        self.assertEqual(len(self.workers._workers), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,235 @@
+import os
+import sys
+import time
+import unittest
+from os.path import abspath, dirname, join
+from tempfile import TemporaryDirectory
+from threading import Event
+from unittest.mock import patch
+
+from ovos_bus_client.message import Message
+from ovos_utils.fakebus import FakeBus
+from ovos_utils.ocp import MediaType, PlaybackType, MediaEntry
+
+import skill_ovos_youtube
+from skill_ovos_youtube import SimpleYoutubeSkill, VIDEO_URI
+from skill_ovos_youtube.metrics import SearchMetrics
+from skill_ovos_youtube.stream_resolver import StreamExtractor, \
+    StreamResolver
+
+sys.path.insert(0, join(dirname(dirname(dirname(abspath(__file__)))),
+                        "scripts"))
+from youtube_replay import ReplayYoutubeSearch, replay_youtube  # noqa: E402
+
+
+def failing_search(after):
+    """ iterate_youtube that fails like tutubo on a network error """
+
+    def iterate_youtube(self, max_res=-1, *args, **kwargs):
+        results = ReplayYoutubeSearch.iterate_youtube(self, max_res)
+        for _ in range(after):
+            yield next(results)
+        raise RuntimeError("Network error calling YouTube API: timed out")
+
+    return iterate_youtube
+
+
+class SlowExtractor(StreamExtractor):
+    def __init__(self, delay):
+        self.delay = delay
+
+    def extract(self, uri):
+        time.sleep(self.delay)
+        return {"uri": uri + "&stream"}
+
+
+class TestSearchYoutube(unittest.TestCase):
+    """ end to end searches replayed from scripts/fixtures """
+
+    def setUp(self):
+        # settings, search cache, local index and depth history
+        tmp = TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        env = patch.dict(os.environ, {"XDG_CONFIG_HOME": tmp.name,
+                                      "XDG_DATA_HOME": tmp.name})
+        env.start()
+        self.addCleanup(env.stop)
+        self.search = self.enterContext(replay_youtube(skill_ovos_youtube))
+        self.bus = FakeBus()
+        self.skill = SimpleYoutubeSkill(bus=self.bus,
+                                        skill_id="test.youtube")
+        self.addCleanup(self.skill.shutdown)
+
+    def enterContext(self, cm):
+        # unittest.TestCase.enterContext is python 3.11+
+        result = cm.__enter__()
+        self.addCleanup(cm.__exit__, None, None, None)
+        return result
+
+    def search_youtube(self, phrase="zz top", media_type=MediaType.MUSIC):
+        """ (title, score) of every result, in the order OCP ranks them """
+        results = [(r.title, r.match_confidence)
+                   for r in self.skill.search_youtube(phrase, media_type)]
+        return sorted(results, key=lambda r: (-r[1], r[0]))
+
+    def test_repeat_search_ranking(self):
+        first = self.search_youtube()
+        self.assertEqual(self.search_youtube(), first)
+
+    def test_repeat_search_ranking_without_cache(self):
+        # answered from the local index first, the network copies follow
+        self.skill.settings["cache_enabled"] = False
+        first = self.search_youtube()
+        best = {}
+        for title, score in self.search_youtube():
+            best[title] = max(score, best.get(title, score))
+        self.assertEqual(best, dict(first))
+
+    def test_cache_fetch_options(self):
+        self.search_youtube()
+        self.search_youtube()
+        self.assertEqual(self.skill.search_stats["upstream_fetches"], 1)
+        # cached channels were fully parsed, not lazy
+        self.skill.settings["lazy_channels"] = True
+        self.search_youtube()
+        self.assertEqual(self.skill.search_stats["upstream_fetches"], 2)
+
+    def test_coalesce_key(self):
+        # only searches fetching the same results share an upstream fetch
+        self.skill.settings["cache_enabled"] = False
+        keys = []
+        join = self.skill._flights.join
+
+        def record(key, fetch):
+            keys.append(key)
+            return join(key, fetch)
+
+        with patch.object(self.skill._flights, "join", record):
+            self.search_youtube()
+            self.search_youtube("ZZ  Top")
+            self.skill.settings["lazy_channels"] = True
+            self.search_youtube()
+            self.skill.settings["max_channel_videos"] = 3
+            self.search_youtube()
+            self.skill.settings["max_depth"] = 20
+            self.search_youtube()
+        self.assertEqual(keys[0], keys[1])
+        self.assertEqual(len(set(keys)), 4)
+
+    def test_search_timeout(self):
+        # the second page is still being fetched at the deadline
+        self.skill.settings["search_timeout"] = 0.8
+        self.search.page_latency = 0.5
+        start = time.monotonic()
+        results = self.search_youtube()
+        self.assertLess(time.monotonic() - start, 1.0)
+        self.assertTrue(0 < len(results) < 48)
+        self.assertEqual(self.skill.search_stats["deadline"], 1)
+
+    def test_until_deadline(self):
+        closed = Event()
+
+        def results():
+            try:
+                yield 1
+                time.sleep(0.5)
+                yield 2
+            finally:
+                closed.set()
+
+        metrics = SearchMetrics("zz top")
+        start = time.monotonic()
+        self.assertEqual(list(self.skill._until(results(), start + 0.2,
+                                                metrics)), [1])
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertEqual(metrics.cutoff, "deadline")
+        # closed once the abandoned fetch returns
+        self.assertFalse(closed.is_set())
+        self.assertTrue(closed.wait(2))
+
+    def test_until_no_deadline(self):
+        metrics = SearchMetrics("zz top")
+        self.assertEqual(list(self.skill._until((i for i in [1, 2]), None,
+                                                metrics)), [1, 2])
+        self.assertIsNone(metrics.cutoff)
+
+    def test_adaptive_depth(self):
+        self.skill.settings.update(adaptive_depth=True, cache_enabled=False,
+                                   local_index=False)
+        full = self.search_youtube(media_type=MediaType.VIDEO)
+        for _ in range(2):
+            self.assertEqual(self.search_youtube(media_type=MediaType.VIDEO),
+                             full)
+        # learned from the previous searches, stops once confident
+        results = self.search_youtube(media_type=MediaType.VIDEO)
+        self.assertLess(len(results), len(full))
+        self.assertLessEqual(set(results), set(full))
+        self.assertIn("ZZ Top (Youtube Channel)", dict(results))
+        self.assertEqual(self.skill.search_stats["depth"], 1)
+
+    def play(self, media):
+        """ media handed to OCP by the skill's play handler """
+        played = []
+        with patch.object(self.skill, "play_media",
+                          lambda media, **kwargs: played.append(media)):
+            self.skill.play_youtube(Message("ovos.common_play.play",
+                                            {"media": media}))
+        return played
+
+    def prefetch_streams(self, delay=0.0):
+        self.skill.stream_resolver = StreamResolver(SlowExtractor(delay))
+        self.addCleanup(self.skill.stream_resolver.shutdown)
+        videos = [r for r in self.skill.search_youtube("zz top",
+                                                       MediaType.MUSIC)
+                  if isinstance(r, MediaEntry)]
+        # played by the skill, with the stream resolved during the search
+        resolved = [r for r in videos if r.uri.startswith(VIDEO_URI)]
+        self.assertTrue(resolved)
+        for r in resolved:
+            self.assertEqual(r.playback, PlaybackType.SKILL)
+        best = max(videos, key=lambda r: r.match_confidence)
+        self.assertIn(best, resolved)
+        return best
+
+    def test_play_stream(self):
+        best = self.prefetch_streams()
+        played = self.play(best.as_dict)
+        url = best.uri[len(VIDEO_URI):]
+        self.assertEqual(played[0]["uri"], url + "&stream")
+        self.assertEqual(played[0]["playback"], PlaybackType.VIDEO)
+        self.assertEqual(played[0]["title"], best.title)
+
+    def test_play_stream_waits(self):
+        # still resolving when selected, waited for up to stream_wait
+        best = self.prefetch_streams(delay=0.3)
+        played = self.play(best.as_dict)
+        self.assertEqual(played[0]["uri"],
+                         best.uri[len(VIDEO_URI):] + "&stream")
+
+    def test_play_stream_not_resolved(self):
+        # OCP extracts the stream itself
+        best = self.prefetch_streams(delay=2)
+        self.skill.settings["stream_wait"] = 0.1
+        played = self.play(best.as_dict)
+        self.assertEqual(played[0]["uri"], best.uri[len(VIDEO_URI):])
+        self.assertEqual(played[0]["playback"], PlaybackType.VIDEO)
+
+    def test_network_error(self):
+        metrics = []
+        self.bus.on(f"{self.skill.skill_id}.search.metrics",
+                    lambda m: metrics.append(m.data))
+        with patch.object(self.search, "iterate_youtube", failing_search(5)):
+            results = self.search_youtube()
+        self.assertEqual(len(results), 5)
+        self.assertEqual(self.skill.search_stats["upstream_error"], 1)
+        self.assertEqual(metrics[-1]["cutoff"], "upstream_error")
+        # incomplete results are not cached, the next search refetches
+        key = self.skill._cache_key("zz top", MediaType.MUSIC)
+        self.assertIsNone(self.skill.search_cache.get(key))
+        self.search_youtube()
+        self.assertIsNone(metrics[-1]["cutoff"])
+        self.assertEqual(self.skill.search_stats["upstream_fetches"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+import unittest
+from threading import Barrier, Event, Thread
+
+from skill_ovos_youtube.single_flight import SingleFlight
+
+
+class Upstream:
+    """ generator factory that counts calls and yields when released """
+
+    def __init__(self, items, error=None, gated=False):
+        self.items = items
+        self.error = error
+        self.calls = 0
+        self.closed = False
+        self.release = Event()
+        if not gated:
+            self.release.set()
+
+    def __call__(self):
+        self.calls += 1
+        return self._iterate()
+
+    def _iterate(self):
+        try:
+            self.release.wait(5)
+            for i in self.items:
+                yield i
+            if self.error:
+                raise self.error
+        except GeneratorExit:
+            self.closed = True
+            raise
+
+
+def read_all(results, out, errors=None):
+    try:
+        for r in results:
+            out.append(r)
+    except Exception as e:
+        errors.append(e)
+
+
+class TestSingleFlight(unittest.TestCase):
+    def test_single_reader(self):
+        flights = SingleFlight()
+        upstream = Upstream([1, 2, 3])
+        results, shared = flights.join("q", upstream)
+        self.assertFalse(shared)
+        self.assertEqual(list(results), [1, 2, 3])
+        self.assertEqual(flights.readers("q"), 0)
+        # finished flights are not reused
+        results, shared = flights.join("q", upstream)
+        self.assertFalse(shared)
+        self.assertEqual(list(results), [1, 2, 3])
+        self.assertEqual(upstream.calls, 2)
+
+    def test_concurrent_readers_share_upstream(self):
+        flights = SingleFlight()
+        upstream = Upstream(list(range(20)), gated=True)
+        joined = [flights.join("q", upstream) for _ in range(4)]
+        self.assertEqual([shared for _, shared in joined],
+                         [False, True, True, True])
+        self.assertEqual(flights.readers("q"), 4)
+
+        outputs = [[] for _ in joined]
+        threads = [Thread(target=read_all, args=(results, out))
+                   for (results, _), out in zip(joined, outputs)]
+        for t in threads:
+            t.start()
+        upstream.release.set()
+        for t in threads:
+            t.join(5)
+        self.assertEqual(upstream.calls, 1)
+        for out in outputs:
+            self.assertEqual(out, list(range(20)))
+        self.assertEqual(flights.readers("q"), 0)
+
+    def test_reader_leaving_early(self):
+        flights = SingleFlight()
+        upstream = Upstream(list(range(10)), gated=True)
+        first, _ = flights.join("q", upstream)
+        second, shared = flights.join("q", upstream)
+        self.assertTrue(shared)
+
+        upstream.release.set()
+        self.assertEqual(next(first), 0)
+        first.close()  # the caller that started the fetch stops early
+        self.assertEqual(flights.readers("q"), 1)
+        self.assertFalse(upstream.closed)
+
+        self.assertEqual(list(second), list(range(10)))
+        self.assertEqual(upstream.calls, 1)
+
+    def test_last_reader_leaving_closes_upstream(self):
+        flights = SingleFlight()
+        upstream = Upstream(list(range(10)))
+        first, _ = flights.join("q", upstream)
+        second, _ = flights.join("q", upstream)
+        self.assertEqual(next(first), 0)
+        self.assertEqual(next(second), 0)
+        first.close()
+        self.assertFalse(upstream.closed)
+        second.close()
+        self.assertTrue(upstream.closed)
+        self.assertEqual(flights.readers("q"), 0)
+
+    def test_upstream_error_reaches_every_reader(self):
+        flights = SingleFlight()
+        error = ConnectionError("youtube is down")
+        upstream = Upstream([1, 2], error=error, gated=True)
+        joined = [flights.join("q", upstream)[0] for _ in range(3)]
+
+        outputs = [[] for _ in joined]
+        errors = [[] for _ in joined]
+        start = Barrier(len(joined) + 1)
+
+        def reader(results, out, errs):
+            start.wait()
+            read_all(results, out, errs)
+
+        threads = [Thread(target=reader, args=args)
+                   for args in zip(joined, outputs, errors)]
+        for t in threads:
+            t.start()
+        start.wait()
+        upstream.release.set()
+        for t in threads:
+            t.join(5)
+        self.assertEqual(upstream.calls, 1)
+        for out, errs in zip(outputs, errors):
+            self.assertEqual(out, [1, 2])
+            self.assertEqual(errs, [error])
+
+    def test_different_keys_do_not_share(self):
+        flights = SingleFlight()
+        upstream = Upstream([1])
+        _, shared_a = flights.join("a", upstream)
+        _, shared_b = flights.join("b", upstream)
+        self.assertFalse(shared_a)
+        self.assertFalse(shared_b)
+        self.assertEqual(upstream.calls, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
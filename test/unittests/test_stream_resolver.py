@@ -0,0 +1,104 @@
+import time
+import unittest
+from threading import Event
+from unittest.mock import patch
+
+from skill_ovos_youtube.stream_resolver import StreamExtractor, \
+    StreamResolver, stream_expiration
+
+URL = "https://www.youtube.com/watch?v=0"
+
+
+class GatedExtractor(StreamExtractor):
+    """ resolves once released, counts extractions """
+
+    def __init__(self, expires=None, error=None):
+        self.expires = expires
+        self.error = error
+        self.calls = []
+        self.release = Event()
+
+    def extract(self, uri):
+        self.calls.append(uri)
+        self.release.wait(5)
+        if self.error:
+            raise self.error
+        meta = {"uri": uri + "&stream"}
+        if self.expires:
+            meta["expires"] = self.expires
+        return meta
+
+
+class TestStreamExpiration(unittest.TestCase):
+    def test_expires(self):
+        self.assertEqual(stream_expiration({"uri": URL, "expires": 123}, 60),
+                         123)
+
+    def test_expire_param(self):
+        meta = {"uri": "https://rr1.googlevideo.com/videoplayback?"
+                       "expire=1700000000&ei=x"}
+        self.assertEqual(stream_expiration(meta, 60), 1700000000)
+
+    def test_default_ttl(self):
+        now = time.time()
+        self.assertAlmostEqual(stream_expiration({"uri": URL}, 60), now + 60,
+                               delta=1)
+
+
+class TestStreamResolver(unittest.TestCase):
+    def setUp(self):
+        self.extractor = GatedExtractor()
+        self.resolver = StreamResolver(self.extractor, ttl=3600, margin=300,
+                                       max_entries=2)
+        self.addCleanup(self.resolver.shutdown)
+
+    def test_prefetch(self):
+        self.resolver.prefetch([URL])
+        self.assertIsNone(self.resolver.get(URL))  # still resolving
+        self.extractor.release.set()
+        self.assertEqual(self.resolver.resolve(URL), {"uri": URL + "&stream"})
+        self.assertEqual(self.resolver.get(URL), {"uri": URL + "&stream"})
+        self.assertEqual(self.extractor.calls, [URL])
+
+    def test_resolve_waits_for_prefetch(self):
+        # joins the resolution in progress instead of starting another one
+        self.resolver.prefetch([URL])
+        self.resolver.prefetch([URL])
+        time.sleep(0.1)
+        self.extractor.release.set()
+        self.assertEqual(self.resolver.resolve(URL, timeout=2),
+                         {"uri": URL + "&stream"})
+        self.assertEqual(self.extractor.calls, [URL])
+
+    def test_resolve_timeout(self):
+        start = time.monotonic()
+        self.assertIsNone(self.resolver.resolve(URL, timeout=0.2))
+        self.assertLess(time.monotonic() - start, 1)
+        self.extractor.release.set()
+
+    def test_expiring_streams_not_served(self):
+        self.extractor.expires = time.time() + 100  # within the margin
+        self.extractor.release.set()
+        self.assertIsNone(self.resolver.resolve(URL))
+
+    def test_max_entries(self):
+        self.extractor.release.set()
+        for i in range(3):
+            self.resolver.resolve(f"{URL}{i}")
+        self.assertIsNone(self.resolver.get(f"{URL}0"))
+        self.assertIsNotNone(self.resolver.get(f"{URL}2"))
+
+    def test_extractor_error(self):
+        self.extractor.error = RuntimeError("unavailable")
+        self.extractor.release.set()
+        with patch("skill_ovos_youtube.stream_resolver.LOG") as log:
+            self.assertIsNone(self.resolver.resolve(URL))
+        log.error.assert_called_once()
+        # not pending anymore, the next request tries again
+        self.extractor.error = None
+        self.assertIsNotNone(self.resolver.resolve(URL))
+        self.assertEqual(len(self.extractor.calls), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+import os
+import time
+import unittest
+from io import BytesIO
+from os.path import dirname, join
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from skill_ovos_youtube import thumbnail_cache
+from skill_ovos_youtube.thumbnail_cache import ThumbnailCache
+
+
+class FakeResponse:
+    def __init__(self, content, status_code=200):
+        self.content = content
+        self.status_code = status_code
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise OSError(f"HTTP {self.status_code}")
+
+
+class FakeSession:
+    """ serves thumbnails by url, counts downloads """
+
+    def __init__(self, images):
+        self.images = images
+        self.fetched = []
+
+    def get(self, url, timeout=None):
+        self.fetched.append(url)
+        if url not in self.images:
+            return FakeResponse(b"", 404)
+        return FakeResponse(self.images[url])
+
+
+def url(i):
+    return f"https://i.ytimg.com/vi/{i}/hqdefault.jpg"
+
+
+class TestThumbnailCache(unittest.TestCase):
+    def setUp(self):
+        tmp = TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = join(tmp.name, "thumbnails")
+        # originals are cached as is without Pillow
+        patcher = patch.object(thumbnail_cache, "Image", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.session = FakeSession({url(i): bytes([i]) * 100
+                                    for i in range(5)})
+        self.session.images[url("copy")] = self.session.images[url(0)]
+        self.cache = self.new_cache()
+
+    def new_cache(self, **kwargs):
+        cache = ThumbnailCache(self.path, **kwargs)
+        cache._session = self.session
+        self.addCleanup(cache.shutdown)
+        return cache
+
+    def download(self, *urls, cache=None):
+        cache = cache or self.cache
+        cache.prefetch(urls)
+        deadline = time.monotonic() + 5
+        while cache._pending and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def test_prefetch(self):
+        self.assertIsNone(self.cache.get(url(0)))
+        self.download(url(0))
+        path = self.cache.get(url(0))
+        self.assertEqual(dirname(path), self.path)
+        with open(path, "rb") as f:
+            self.assertEqual(f.read(), bytes([0]) * 100)
+        self.download(url(0))
+        self.assertEqual(self.session.fetched, [url(0)])
+
+    def test_stored_once_per_content(self):
+        self.download(url(0), url("copy"))
+        self.assertEqual(self.cache.get(url(0)), self.cache.get(url("copy")))
+
+    def test_failed_download(self):
+        self.download(url("missing"), "")
+        self.assertIsNone(self.cache.get(url("missing")))
+        self.assertEqual(self.session.fetched, [url("missing")])
+        # retried on the next prefetch
+        self.download(url("missing"))
+        self.assertEqual(len(self.session.fetched), 2)
+
+    def test_least_recently_used_evicted(self):
+        cache = self.new_cache(max_bytes=250)
+        now = time.time()
+        for i in range(2):
+            self.download(url(i), cache=cache)
+            os.utime(cache.get(url(i)), (now - 10 + i, now - 10 + i))
+        self.download(url(2), cache=cache)
+        self.assertIsNone(cache.get(url(0)))
+        self.assertIsNotNone(cache.get(url(1)))
+        self.assertIsNotNone(cache.get(url(2)))
+
+    def test_persisted(self):
+        self.download(url(0))
+        cache = self.new_cache()
+        self.assertEqual(cache.get(url(0)), self.cache.get(url(0)))
+
+    def test_clear(self):
+        self.download(url(0))
+        path = self.cache.get(url(0))
+        self.cache.clear()
+        self.assertIsNone(self.cache.get(url(0)))
+        self.assertFalse(os.path.exists(path))
+        self.assertIsNone(self.new_cache().get(url(0)))
+
+
+class TestThumbnailDownscale(unittest.TestCase):
+    @unittest.skipIf(thumbnail_cache.Image is None, "requires Pillow")
+    def test_downscaled(self):
+        Image = thumbnail_cache.Image
+        buffer = BytesIO()
+        Image.new("RGB", (1280, 720)).save(buffer, "PNG")
+        with TemporaryDirectory() as tmp:
+            cache = ThumbnailCache(tmp, size=(320, 180))
+            cache._session = FakeSession({url(0): buffer.getvalue()})
+            cache._fetch(url(0))
+            cache.shutdown()
+            with Image.open(cache.get(url(0))) as img:
+                self.assertEqual(img.size, (320, 180))
+                self.assertEqual(img.format, "JPEG")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import time
+import unittest
+from os.path import join
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from skill_ovos_youtube.results import VideoResult
+from skill_ovos_youtube.video_index import VideoIndex
+
+
+def video(i, title, channel=""):
+    return VideoResult(uri=f"https://www.youtube.com/watch?v={i}",
+                       title=title, length=60, image=f"{i}.jpg",
+                       channel=channel)
+
+
+class TestVideoIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.index = VideoIndex(join(self.tmp.name, "index.db"),
+                                max_entries=3, max_age=60)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_search(self):
+        tush = video(0, "ZZ Top - Tush (Official Video)", "ZZ Top")
+        lofi = video(1, "lofi hip hop radio", "Lofi Girl")
+        self.index.add([tush, lofi])
+        self.assertEqual(self.index.search("tush"), [tush])
+        self.assertEqual(self.index.search("lofi girl"), [lofi])
+        self.assertEqual(self.index.search("zz top"), [tush])
+        self.assertEqual(self.index.search("metallica"), [])
+        self.assertEqual(self.index.search("!!!"), [])
+
+    def test_limit(self):
+        self.index.add([video(i, f"song {i}") for i in range(3)])
+        self.assertEqual(len(self.index.search("song", limit=2)), 2)
+
+    def test_add_updates_existing_videos(self):
+        self.index.add([video(0, "old title")])
+        self.index.add([video(0, "new title")])
+        self.assertEqual(self.index.search("old"), [])
+        self.assertEqual(self.index.search("new"), [video(0, "new title")])
+
+    def test_max_entries(self):
+        now = time.time()
+        for i in range(5):
+            with patch("time.time", return_value=now + i):
+                self.index.add([video(i, f"song {i}")])
+        found = {v.uri[-1] for v in self.index.search("song")}
+        self.assertEqual(found, {"2", "3", "4"})
+
+    def test_max_age(self):
+        now = time.time()
+        with patch("time.time", return_value=now):
+            self.index.add([video(0, "old song")])
+        with patch("time.time", return_value=now + 61):
+            self.index.add([video(1, "new song")])
+        self.assertEqual(self.index.search("song"), [video(1, "new song")])
+
+    def test_like_fallback(self):
+        self.index.fts = False  # sqlite without FTS5
+        self.index.add([video(0, "ZZ Top - Tush")])
+        self.assertEqual(self.index.search("tush"), [video(0, "ZZ Top - Tush")])
+
+    def test_clear(self):
+        self.index.add([video(0, "song")])
+        self.index.clear()
+        self.assertEqual(self.index.search("song"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,162 @@
+import hashlib
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from io import BytesIO
+from os.path import join, splitext, exists
+from threading import Lock
+from typing import Iterable, Optional, Tuple
+from urllib.parse import urlparse
+
+from ovos_utils.log import LOG
+
+try:
+    from PIL import Image
+except ImportError:  # only the original images are cached
+    Image = None
+
+
+class ThumbnailCache:
+    """ content addressed on disk store of result thumbnails
+
+    images are stored once per content hash, no matter how many urls point
+    to them, downscaled for the GUI if Pillow is installed.
+    file modification times track last use, the least recently used images
+    are evicted when the store grows over max_bytes
+    """
+
+    def __init__(self, path: str, max_bytes: int = 50 * 1024 * 1024,
+                 size: Tuple[int, int] = (320, 180), workers: int = 2):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.size = tuple(size)
+        self._paths = {}  # url -> local file, for images ready to use
+        self._pending = set()
+        self._lock = Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers)
+        self._session = None
+        os.makedirs(path, exist_ok=True)
+        with self._connect() as db:
+            db.execute("CREATE TABLE IF NOT EXISTS urls ("
+                       "url TEXT PRIMARY KEY, file TEXT NOT NULL)")
+            db.commit()
+            for url, file in db.execute("SELECT url, file FROM urls"):
+                self._paths[url] = join(path, file)
+
+    def _connect(self):
+        return closing(sqlite3.connect(join(self.path, "urls.db"),
+                                       timeout=10))
+
+    def get(self, url: str) -> Optional[str]:
+        """ local file for url, if it was already downloaded """
+        path = self._paths.get(url)
+        if not path:
+            return None
+        try:
+            os.utime(path)  # mark as recently used
+        except OSError:  # evicted
+            with self._lock:
+                self._paths.pop(url, None)
+            return None
+        return path
+
+    def prefetch(self, urls: Iterable[str]):
+        """ start downloading urls in the background """
+        for url in urls:
+            with self._lock:
+                if not url or url in self._pending or url in self._paths:
+                    continue
+                self._pending.add(url)
+            self._pool.submit(self._fetch, url)
+
+    def _fetch(self, url: str):
+        try:
+            if self._session is None:
+                import requests
+                self._session = requests.Session()  # keep-alive
+            response = self._session.get(url, timeout=10)
+            response.raise_for_status()
+            file = self._store(url, response.content)
+            with self._lock:
+                self._paths[url] = join(self.path, file)
+            with self._connect() as db:
+                db.execute("INSERT OR REPLACE INTO urls (url, file) "
+                           "VALUES (?, ?)", (url, file))
+                db.commit()
+            self._evict()
+        except Exception as e:
+            LOG.debug(f"failed to cache thumbnail {url}: {e}")
+        finally:
+            with self._lock:
+                self._pending.discard(url)
+
+    def _store(self, url: str, data: bytes) -> str:
+        """ save the image or its downscaled variant, returns the file """
+        digest = hashlib.sha1(data).hexdigest()
+        if Image is None:
+            ext = splitext(urlparse(url).path)[1] or ".jpg"
+            original = digest + ext
+            if not exists(join(self.path, original)):
+                self._write(original, data)
+            return original
+        variant = f"{digest}_{self.size[0]}x{self.size[1]}.jpg"
+        if not exists(join(self.path, variant)):
+            img = Image.open(BytesIO(data))
+            img.thumbnail(self.size)
+            buffer = BytesIO()
+            img.convert("RGB").save(buffer, "JPEG", quality=85)
+            self._write(variant, buffer.getvalue())
+        return variant
+
+    def _write(self, file: str, data: bytes):
+        tmp = join(self.path, file + ".tmp")
+        with open(tmp, "wb") as f:
+            f.write(data)
+        # atomic, the GUI never sees a partial image
+        os.replace(tmp, join(self.path, file))
+
+    def _evict(self):
+        """ delete least recently used images until under max_bytes """
+        files = []
+        total = 0
+        for entry in os.scandir(self.path):
+            if entry.name.startswith("urls.db") or \
+                    entry.name.endswith(".tmp"):
+                continue
+            stat = entry.stat()
+            files.append((stat.st_mtime, stat.st_size, entry.name))
+            total += stat.st_size
+        if total <= self.max_bytes:
+            return
+        evicted = []
+        for _, size, name in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(join(self.path, name))
+            except FileNotFoundError:  # evicted by another download
+                pass
+            evicted.append(name)
+            total -= size
+        with self._lock:
+            gone = {join(self.path, name) for name in evicted}
+            for url in [u for u, p in self._paths.items() if p in gone]:
+                self._paths.pop(url)
+        with self._connect() as db:
+            db.executemany("DELETE FROM urls WHERE file = ?",
+                           [(name,) for name in evicted])
+            db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._paths.clear()
+        for entry in os.scandir(self.path):
+            if not entry.name.startswith("urls.db"):
+                os.remove(entry.path)
+        with self._connect() as db:
+            db.execute("DELETE FROM urls")
+            db.commit()
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False)
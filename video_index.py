@@ -0,0 +1,116 @@
+import re
+import sqlite3
+import time
+from contextlib import closing
+from threading import Lock
+from typing import List
+
+from .results import VideoResult
+
+
+class VideoIndex:
+    """ sqlite full text index of every video seen in previous searches
+
+    uses FTS5 when available and falls back to LIKE queries otherwise,
+    the index is compacted by age and size after every update
+    """
+
+    def __init__(self, path: str, max_entries: int = 5000,
+                 max_age: float = 30 * 24 * 3600):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._lock = Lock()
+        with self._connect() as db:
+            db.execute("CREATE TABLE IF NOT EXISTS videos ("
+                       "id INTEGER PRIMARY KEY, "
+                       "uri TEXT UNIQUE NOT NULL, "
+                       "title TEXT NOT NULL, "
+                       "channel TEXT NOT NULL DEFAULT '', "
+                       "length INTEGER NOT NULL DEFAULT 0, "
+                       "image TEXT NOT NULL DEFAULT '', "
+                       "seen REAL NOT NULL)")
+            db.execute("CREATE INDEX IF NOT EXISTS videos_seen "
+                       "ON videos (seen)")
+            try:
+                db.execute("CREATE VIRTUAL TABLE IF NOT EXISTS videos_fts "
+                           "USING fts5(title, channel, "
+                           "content='videos', content_rowid='id')")
+                self.fts = True
+            except sqlite3.OperationalError:  # sqlite without FTS5
+                self.fts = False
+            if self.fts:
+                # keep the full text index in sync with the videos table
+                db.executescript("""
+                CREATE TRIGGER IF NOT EXISTS videos_ai AFTER INSERT ON videos
+                BEGIN
+                    INSERT INTO videos_fts (rowid, title, channel)
+                    VALUES (new.id, new.title, new.channel);
+                END;
+                CREATE TRIGGER IF NOT EXISTS videos_ad AFTER DELETE ON videos
+                BEGIN
+                    INSERT INTO videos_fts (videos_fts, rowid, title, channel)
+                    VALUES ('delete', old.id, old.title, old.channel);
+                END;
+                CREATE TRIGGER IF NOT EXISTS videos_au AFTER UPDATE ON videos
+                BEGIN
+                    INSERT INTO videos_fts (videos_fts, rowid, title, channel)
+                    VALUES ('delete', old.id, old.title, old.channel);
+                    INSERT INTO videos_fts (rowid, title, channel)
+                    VALUES (new.id, new.title, new.channel);
+                END;
+                """)
+            db.commit()
+
+    def _connect(self):
+        return closing(sqlite3.connect(self.path, timeout=10))
+
+    def add(self, videos: List[VideoResult]):
+        """ insert or refresh videos, then compact the index """
+        if not videos:
+            return
+        now = time.time()
+        with self._lock, self._connect() as db:
+            db.executemany(
+                "INSERT INTO videos (uri, title, channel, length, image, seen) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (uri) DO UPDATE SET title = excluded.title, "
+                "channel = excluded.channel, length = excluded.length, "
+                "image = excluded.image, seen = excluded.seen",
+                [(v.uri, v.title, v.channel, v.length, v.image, now)
+                 for v in videos])
+            db.execute("DELETE FROM videos WHERE seen < ?",
+                       (now - self.max_age,))
+            db.execute("DELETE FROM videos WHERE id NOT IN ("
+                       "SELECT id FROM videos ORDER BY seen DESC LIMIT ?)",
+                       (self.max_entries,))
+            db.commit()
+
+    def search(self, phrase: str, limit: int = 10) -> List[VideoResult]:
+        """ videos whose title or channel share words with the phrase """
+        tokens = re.findall(r"\w+", phrase.lower())
+        if not tokens:
+            return []
+        cols = "v.uri, v.title, v.length, v.image, v.channel"
+        with self._lock, self._connect() as db:
+            if self.fts:
+                query = " OR ".join(f'"{t}"' for t in tokens)
+                rows = db.execute(
+                    f"SELECT {cols} FROM videos_fts f "
+                    f"JOIN videos v ON v.id = f.rowid "
+                    f"WHERE videos_fts MATCH ? ORDER BY f.rank LIMIT ?",
+                    (query, limit)).fetchall()
+            else:
+                where = " OR ".join(["v.title LIKE ? OR v.channel LIKE ?"] *
+                                    len(tokens))
+                args = [f"%{t}%" for t in tokens for _ in range(2)]
+                rows = db.execute(
+                    f"SELECT {cols} FROM videos v WHERE {where} "
+                    f"ORDER BY v.seen DESC LIMIT ?",
+                    args + [limit]).fetchall()
+        return [VideoResult(*r) for r in rows]
+
+    def clear(self):
+        with self._lock, self._connect() as db:
+            db.execute("DELETE FROM videos")
+            db.commit()